@@ -1,17 +1,24 @@
 from pathlib import Path
-import os, yaml, io
-import pandas as pd
+import yaml, io, uuid
 import streamlit as st
 from PIL import Image
 from streamlit_drawable_canvas import st_canvas
 
 from modules.auth import is_admin, get_settings
 from modules.utils import save_history_row
-from modules.ingest import ensure_guidance_from_zip, index_folder
-from modules.doc_rules import load_ruleset, run_doc_checks
-from modules.pdf_annotate import render_page_image, annotate_points, annotate_text_matches
-from modules.rule_mining import mine_rules_from_file
-from modules.analytics import load_history
+from modules.ingest import ensure_guidance_from_zip, index_folder, file_digest, guidance_source
+from modules.catalog import open_catalog
+from modules.doc_rules import load_ruleset, load_mined_rules, save_mined_rules, select_rules, BASE_RULES
+from modules.config_store import thaw
+from modules.text_cache import TEXT_CACHE
+from modules.ocr import OCR
+from modules.metrics import METRICS, summary, write_prometheus, serve as serve_metrics
+from modules.pdf_annotate import annotate_points
+from modules.render_cache import source_digest, page_sizes, render_page, render_progressive
+from modules.rule_mining import new_rules_only, stable_rule_id
+from modules.analytics import load_history, history_store
+from modules.jobs import get_queue
+from modules.report_store import configure as configure_reports
 
 st.set_page_config(page_title="AI Design Auditor V3", layout="wide", page_icon="🛰️")
 
@@ -27,16 +34,63 @@ tabs = st.tabs(["Audit", "Train (Admin)", "Analytics", "Settings"])
 settings = get_settings()
 ruleset = load_ruleset()
 g_root = Path(settings.get("guidance",{}).get("root_path","guidance"))
-index_file = Path(settings.get("guidance",{}).get("index_file","guidance_index.csv"))
+index_file = Path(settings.get("guidance",{}).get("index_file","guidance_index.sqlite"))
 privacy_hide = settings.get("privacy",{}).get("hide_guidance_for_non_admin", True)
+TEXT_CACHE.max_bytes = int(settings.get("cache",{}).get("text_max_mb", 512))*1024*1024
+OCR.update(settings.get("ocr",{}))
+reports_cfg = settings.get("reports",{})
+REPORTS = configure_reports(reports_cfg)
+if reports_cfg.get("evict_every_s", 600): REPORTS.start_evictor(float(reports_cfg.get("evict_every_s", 600)))
+keep_reports = bool(reports_cfg.get("keep_annotated_copies", True))
+metrics_cfg = settings.get("metrics",{})
+METRICS.enabled = bool(metrics_cfg.get("enabled", True))
+if METRICS.enabled and metrics_cfg.get("port"):
+    try: serve_metrics(int(metrics_cfg["port"]), metrics_cfg.get("host","127.0.0.1"))
+    except OSError as e: st.sidebar.warning(f"Metrics endpoint not started: {e}")
 
-# Auto-ingest guidance ZIP if present
+# Auto-ingest guidance ZIP if present: only changed members are extracted, and an unchanged
+# archive isn't opened at all. In "lazy" mode documents are indexed/read straight from the ZIP.
 zip_path = g_root / "Guidance.zip"
+lazy_zip = settings.get("guidance",{}).get("zip_mode","extract") == "lazy"
+index_root = zip_path if (lazy_zip and zip_path.exists()) else g_root
 if zip_path.exists():
-    ensure_guidance_from_zip(zip_path, g_root)
+    ensure_guidance_from_zip(zip_path, g_root, extract=not lazy_zip)
     # build index on start if not exists
-    if not index_file.exists():
-        index_folder(g_root, index_file, mode="overwrite", supersede=True)
+    if not index_file.exists() and not index_file.with_suffix(".csv").exists():
+        index_folder(index_root, index_file, mode="overwrite", supersede=True)
+catalog = open_catalog(index_file, g_root) if (index_file.exists() or index_file.with_suffix(".csv").exists()) else None
+jobs = get_queue()
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@fragment(run_every=1.0)
+def job_progress(job_id):
+    # polls on its own every second; the whole page reruns once, when the job has finished
+    job = jobs.get(job_id)
+    if job is None or job["status"] not in ("queued", "running"): st.rerun()
+    st.progress(job["progress"] or 0.0, text=f"{job['status'].title()}: {job['message'] or ''}")
+
+def job_result(job_id):
+    # show progress for a queued/running job, or return its result when done
+    job = jobs.get(job_id)
+    if job is None: return None
+    if job["status"] in ("queued", "running"):
+        job_progress(job_id)
+        return None
+    if job["status"] == "failed":
+        st.error(f"Job failed: {job['message']} (run it again to retry)")
+        return None
+    return jobs.result(job_id)
+
+def show_doc_audit(job_id):
+    res = job_result(job_id)
+    if res is None: return
+    df = res["findings"]
+    st.success(f"Audit complete: {len(df)} finding(s).")
+    st.dataframe(df, use_container_width=True)
+    if not Path(res["xlsx"]).exists():
+        st.warning("The Excel report has expired from the report store; run the audit again to rebuild it."); return
+    with open(res["xlsx"], "rb") as f:
+        st.download_button("Download Findings (Excel)", data=f, file_name=res.get("xlsx_name") or Path(res["xlsx"]).name, key=f"dl_{job_id}")
 
 # -------------- AUDIT --------------
 with tabs[0]:
@@ -60,6 +114,9 @@ with tabs[0]:
         with col4:
             radio_loc= st.selectbox("Radio Location", ui.get("radio_locations",[]))
             sectors  = st.selectbox("Sectors", [1,2,3,4], index=2)
+        # only rules whose context matches this site are evaluated (rules without a context always apply)
+        site_ctx = {"project": project, "site_type": site_type, "vendor": vendor, "radio": radio_loc}
+        site_rules = select_rules(ruleset, site_ctx)
 
         st.markdown("**MIMO per sector**")
         mimo_opts = ui.get("mimo_options",["2x2","4x4"])
@@ -83,37 +140,44 @@ with tabs[0]:
         run = st.button("Run Design Audit", disabled=design_pdf is None)
 
         if run and design_pdf:
-            p = Path("reports")/design_pdf.name
-            p.write_bytes(design_pdf.read())
+            data = design_pdf.getvalue()
+            art = REPORTS.put(data, design_pdf.name, "upload")
+            # Every page is checked against every applicable 'pdf_text_presence' rule in a background job;
+            # rules found nowhere become rejection rows for admin validation
+            # one history record per submission, keyed by a per-submission id: the job writes it when it
+            # runs (kept even if this tab is closed), and this session writes it on first seeing the
+            # result when the job was already done or running for an earlier submission
+            history = {"payload": {"Project": project, "Client": client, "Supplier": supplier, "Vendor": vendor,
+                                   "Site Address": site_address, "Drawing Title": drawing_title,
+                                   "Design File": design_pdf.name, "Status": "Completed"},
+                       "exclude": exclude_analytics, "submission": uuid.uuid4().hex}
+            jid = jobs.submit("design_audit", art.sha,
+                              {"input": str(art.path), "input_sha": art.sha, "rules": thaw(site_rules), "annotate": auto_annot,
+                               "name": f"annotated_{Path(design_pdf.name).stem}.pdf", "history": history},
+                              rules_version=site_rules["version"], params={"annotate": auto_annot}, retry=True)
+            st.session_state["design_job"] = {"id": jid, "history": history}
 
-            # Construct findings: look for every 'pdf_text_presence' rule
-            matches = []
-            rejections = []
-            for r in ruleset.get("rules", []):
-                if r.get("type")!="pdf_text_presence": continue
-                for t in r.get("options",{}).get("any",[]):
-                    matches.append({"page":1,"text":t,"note":f"{r.get('id')}: {t}"})
-                    # For now, we check existence by adding an annotation pass;
-                    # Missing items will get a [Missing] note in the output PDF
-                    # And we also record a rejection row for admin validation
-                    rejections.append({
-                        "RuleID": r.get("id"),
-                        "Description": r.get("description",""),
-                        "Anchor": t,
-                        "Severity": r.get("severity","minor"),
-                        "Decision": "",  # admin will mark
-                        "Source": "pdf_text_presence"
-                    })
+        djob = st.session_state.get("design_job")
+        audit = job_result(djob["id"]) if djob else None
+        if audit is not None:
+            if not djob.get("saved"):
+                h = djob["history"]
+                results = audit.get("results")
+                save_history_row(h["payload"], exclude=h["exclude"], source=f"submit:{h['submission']}",
+                                 findings=None if results is None else results.to_dict("records"))
+                djob["saved"] = True
+            if audit.get("annotated") and Path(audit["annotated"]).exists():
+                with open(audit["annotated"], "rb") as f:
+                    st.download_button("Download Auto-Annotated PDF", data=f, mime="application/pdf",
+                                       file_name=audit.get("annotated_name") or Path(audit["annotated"]).name)
+            elif audit.get("annotated"):
+                st.warning("The annotated PDF has expired from the report store; run the audit again to rebuild it.")
 
-            out_annot = None
-            if auto_annot and matches:
-                out_annot = Path("reports")/f"annotated_{p.stem}.pdf"
-                annotate_text_matches(p, out_annot, matches)
-                with open(out_annot, "rb") as f:
-                    st.download_button("Download Auto-Annotated PDF", data=f, file_name=out_annot.name, mime="application/pdf")
-
-            st.success("Design audit completed. Review rejections below (admin can confirm).")
-            rej_df = pd.DataFrame(rejections).drop_duplicates(subset=["RuleID","Anchor"])
+            st.success(f"Design audit completed ({audit['pages']} page(s) checked). Review rejections below (admin can confirm).")
+            with st.expander("Per-page results"):
+                st.dataframe(audit["per_page"], use_container_width=True)
+            rej_df = audit["rejections"]
+            if not rej_df.empty: rej_df = rej_df.drop_duplicates(subset=["RuleID","Anchor"])
             st.dataframe(rej_df, use_container_width=True)
 
             if is_admin(token) and not rej_df.empty:
@@ -121,72 +185,77 @@ with tabs[0]:
                 to_add = st.multiselect("Select rows to mark as Valid (will be appended to guidance_mined.yaml)",
                                         rej_df.index.tolist(), format_func=lambda i: f"{rej_df.loc[i,'RuleID']} — {rej_df.loc[i,'Anchor']}")
                 if st.button("Append selected to ruleset", disabled=len(to_add)==0):
-                    with open("rulesets/guidance_mined.yaml","r",encoding="utf-8") as f:
-                        y = yaml.safe_load(f) or {"rules":[]}
+                    y = load_mined_rules()
+                    known = {x.get("id") for x in y["rules"]}
                     for i in to_add:
                         r = rej_df.loc[i]
+                        rid = stable_rule_id(f"{r['RuleID']} {r['Anchor']} {project} {site_type} {vendor} {radio_loc}", "AUTO")
+                        if rid in known: continue
+                        known.add(rid)
                         y.setdefault("rules", []).append({
-                            "id": f"AUTO_{r['RuleID']}_{abs(hash(r['Anchor']))%10**6}",
+                            "id": rid,
                             "type": "pdf_text_presence",
                             "severity": r["Severity"],
                             "description": r["Description"] or f"Presence of '{r['Anchor']}' in design PDF.",
                             "options": {"any": [r["Anchor"]]},
                             "context": {"project": project, "site_type": site_type, "vendor": vendor, "radio": radio_loc}
                         })
-                    with open("rulesets/guidance_mined.yaml","w",encoding="utf-8") as f:
-                        yaml.safe_dump(y, f, sort_keys=False, allow_unicode=True)
+                    save_mined_rules(y)
                     st.success("Appended. Rerun audit to apply.")
 
-            # history
-            payload = {"Project": project, "Client": client, "Supplier": supplier, "Vendor": vendor,
-                       "Site Address": site_address, "Drawing Title": drawing_title,
-                       "Design File": design_pdf.name, "Status": "Completed"}
-            save_history_row(payload, exclude=exclude_analytics)
-
         st.divider()
         st.subheader("Manual click-to-pin")
         pdf2 = st.file_uploader("Upload PDF to annotate", type=["pdf"], key="pdf2")
         if pdf2:
-            temp_pdf = Path("reports")/pdf2.name
-            temp_pdf.write_bytes(pdf2.read())
-            import fitz
-            d = fitz.open(str(temp_pdf)); n = len(d); d.close()
-            page = st.number_input("Page", min_value=1, max_value=n, value=1, step=1)
-            img = render_page_image(temp_pdf, page, zoom=2.0)
+            data = pdf2.getvalue()
+            sha = source_digest(data)
+            sizes = page_sizes(data, sha)
+            page = st.number_input("Page", min_value=1, max_value=len(sizes), value=1, step=1)
+            img, _, sharp = render_progressive(data, page, zoom=2.0, preview_zoom=0.5, sha=sha)
             note = st.text_input("Note", value="Issue")
-            canvas = st_canvas(background_image=Image.open(io.BytesIO(img)), drawing_mode="point", stroke_width=2, key="canvas_pdf")
+            pw, ph = sizes[page-1]
+            cw = 1000; ch = int(cw * ph / pw)
+            canvas = st_canvas(background_image=Image.open(io.BytesIO(img)), drawing_mode="point", stroke_width=2,
+                               width=cw, height=ch, key="canvas_pdf")
             pins = []
             if canvas.json_data is not None:
                 for obj in canvas.json_data["objects"]:
                     if obj.get("type")=="circle":
                         x = float(obj.get("left",0)) + float(obj.get("radius",0))
                         y = float(obj.get("top",0)) + float(obj.get("radius",0))
-                        pins.append({"page": page, "x": x/2.0, "y": y/2.0, "note": note})
+                        pins.append({"page": page, "x": x*pw/cw, "y": y*ph/ch, "note": note})
             if st.button("Apply Pins", disabled=len(pins)==0):
-                outp = Path("reports")/f"manual_{temp_pdf.stem}.pdf"
-                annotate_points(temp_pdf, outp, pins)
-                with open(outp, "rb") as f:
-                    st.download_button("Download Annotated", data=f, file_name=outp.name, mime="application/pdf")
+                # annotated straight from the upload buffer; a copy is kept in the report store only if configured
+                out_name = f"manual_{Path(pdf2.name).stem}.pdf"
+                annotated = annotate_points(data, None, pins)
+                if keep_reports: REPORTS.put(annotated, out_name, "annotated", input_sha=sha)
+                st.download_button("Download Annotated", data=annotated, file_name=out_name, mime="application/pdf")
+            if not sharp:
+                # preview shown; render the full-resolution page into the cache and redraw
+                render_page(data, page, zoom=2.0, sha=sha)
+                st.rerun()
 
     # Document audit
     with sub[1]:
         st.subheader("Guidance/Document Audit")
+        use_ctx = st.checkbox(f"Only rules for the site context ({project} / {site_type} / {vendor} / {radio_loc})", value=True)
+        doc_rules = site_rules if use_ctx else ruleset
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("**From Guidance Library (Admin)**")
             if (not privacy_hide) or is_admin(token):
-                if index_file.exists():
-                    idx = pd.read_csv(index_file)
+                if catalog is not None:
+                    idx = catalog.frame()
                     st.dataframe(idx[["series","key","version","file","active"]], use_container_width=True, height=240)
-                    pick = st.selectbox("Choose document", [""] + idx.loc[idx["active"]==True,"file"].tolist())
+                    pick = st.selectbox("Choose document", [""] + catalog.files(active_only=True))
                     if st.button("Run Audit (Selected)") and pick:
-                        p = g_root / pick
-                        df = run_doc_checks(p, ruleset)
-                        st.success(f"Audit complete: {len(df)} finding(s).")
-                        st.dataframe(df, use_container_width=True)
-                        out = Path("reports") / f"doc_audit_{Path(pick).stem}.xlsx"
-                        with pd.ExcelWriter(out, engine="openpyxl") as w: df.to_excel(w, index=False, sheet_name="Findings")
-                        with open(out, "rb") as f: st.download_button("Download Findings (Excel)", data=f, file_name=out.name)
+                        p = guidance_source(g_root, pick)
+                        sha = file_digest(p)
+                        st.session_state["doc_job_sel"] = jobs.submit("doc_audit", sha,
+                            {"input": p, "input_sha": sha, "rules": thaw(doc_rules), "name": f"doc_audit_{Path(pick).stem}.xlsx"},
+                            rules_version=doc_rules["version"], retry=True)
+                    if st.session_state.get("doc_job_sel"):
+                        show_doc_audit(st.session_state["doc_job_sel"])
                 else:
                     st.info("Index not built. Use Train → Guidance to index.")
             else:
@@ -195,13 +264,13 @@ with tabs[0]:
             st.markdown("**Ad-hoc Upload**")
             up = st.file_uploader("Upload DOCX/PDF", type=["docx","pdf"])
             if st.button("Run Audit (Upload)", disabled=up is None):
-                p = Path("reports") / up.name; p.write_bytes(up.read())
-                df = run_doc_checks(p, ruleset)
-                st.success(f"Audit complete: {len(df)} finding(s).")
-                st.dataframe(df, use_container_width=True)
-                out = Path("reports") / f"doc_audit_{p.stem}.xlsx"
-                with pd.ExcelWriter(out, engine="openpyxl") as w: df.to_excel(w, index=False, sheet_name="Findings")
-                with open(out, "rb") as f: st.download_button("Download Findings (Excel)", data=f, file_name=out.name)
+                data = up.getvalue()
+                art = REPORTS.put(data, up.name, "upload")
+                st.session_state["doc_job_up"] = jobs.submit("doc_audit", art.sha,
+                    {"input": str(art.path), "input_sha": art.sha, "rules": thaw(doc_rules),
+                     "name": f"doc_audit_{Path(up.name).stem}.xlsx"}, rules_version=doc_rules["version"], retry=True)
+            if st.session_state.get("doc_job_up"):
+                show_doc_audit(st.session_state["doc_job_up"])
 
 # -------------- TRAIN (ADMIN) --------------
 with tabs[1]:
@@ -213,42 +282,107 @@ with tabs[1]:
         overwrite = st.checkbox("Overwrite index", value=False)
         supersede = st.checkbox("Supersede older versions by key", value=True)
         if st.button("Build/Refresh Index"):
-            out = index_folder(g_root, index_file, mode=("overwrite" if overwrite else "append"), supersede=supersede)
+            skipped = []
+            out = index_folder(index_root, index_file, mode=("overwrite" if overwrite else "append"), supersede=supersede, errors=skipped)
+            catalog = open_catalog(index_file)
             st.success(f"Indexed → {out}")
+            if skipped:
+                st.warning(f"{len(skipped)} file(s) could not be read and were skipped: " + "; ".join(f"{e['file']} ({e['error']})" for e in skipped[:10]))
+
+        if catalog is not None:
+            q = st.text_input("Search guidance library")
+            if q:
+                st.dataframe(catalog.search(q), use_container_width=True, height=240)
 
         st.divider()
         st.subheader("Mine rules from a guidance file")
-        if index_file.exists():
-            idx = pd.read_csv(index_file)
-            pick = st.selectbox("Pick a guidance file", [""] + idx["file"].tolist())
-            if pick:
-                path = g_root / pick
-                mined = mine_rules_from_file(path, max_items=120)
-                if mined.empty:
+        if catalog is not None:
+            pick = st.selectbox("Pick a guidance file", [""] + catalog.files())
+            if st.button("Mine rules", disabled=not pick):
+                path = guidance_source(g_root, pick)
+                st.session_state["mine_job"] = {"file": pick, "id": jobs.submit(
+                    "mine", file_digest(path), {"input": path, "max_items": 120}, params={"max_items": 120}, retry=True)}
+            mjob = st.session_state.get("mine_job")
+            if mjob and mjob["file"] == pick:
+                res = job_result(mjob["id"])
+                mined = res["mined"] if res is not None else None
+                if mined is None:
+                    pass
+                elif mined.empty:
                     st.info("No strong 'shall/must' statements found.")
                 else:
-                    st.dataframe(mined[["id","severity","description","source"]], use_container_width=True, height=260)
+                    st.dataframe(mined[["id","severity","support","score","description","source"]], use_container_width=True, height=260)
                     if st.button("Append top 20 to ruleset"):
-                        with open("rulesets/guidance_mined.yaml","r",encoding="utf-8") as f:
-                            y = yaml.safe_load(f) or {"rules":[]}
-                        for _, r in mined.head(20).iterrows():
+                        y = load_mined_rules()
+                        fresh = new_rules_only(mined, y["rules"])
+                        for _, r in fresh.head(20).iterrows():
                             y.setdefault("rules", []).append({
                                 "id": r["id"], "type": r["type"], "severity": r["severity"],
                                 "description": r["description"],
                                 "options": {"any": [r["options"]["any"][0]], "any_regex": [r["options"]["any_regex"][0]]}
                             })
-                        with open("rulesets/guidance_mined.yaml","w",encoding="utf-8") as f:
-                            yaml.safe_dump(y, f, sort_keys=False, allow_unicode=True)
-                        st.success("Appended mined rules.")
+                        save_mined_rules(y)
+                        st.success(f"Appended {min(len(fresh), 20)} new mined rule(s); {len(mined)-len(fresh)} already present.")
 
 # -------------- ANALYTICS --------------
 with tabs[2]:
     st.header("Analytics")
-    dfh = load_history(Path("history"))
-    if dfh.empty:
+    hist = history_store(Path("history"))
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: f_supplier = st.multiselect("Supplier", hist.distinct("Supplier"))
+    with c2: f_client = st.multiselect("Client", hist.distinct("Client"))
+    with c3: f_project = st.multiselect("Project", hist.distinct("Project"))
+    with c4: incl_excluded = st.checkbox("Include excluded runs", value=False)
+    filters = {"Supplier": f_supplier, "Client": f_client, "Project": f_project}
+    total = hist.count(filters, incl_excluded)
+    if total == 0:
         st.info("No audit history yet.")
     else:
-        st.dataframe(dfh.tail(200), use_container_width=True)
+        st.metric("Audits", total)
+        g1, g2 = st.columns(2)
+        with g1:
+            st.markdown("**Audits per day (90 days)**")
+            st.bar_chart(hist.per_day(filters, incl_excluded).set_index("day"))
+        with g2:
+            by = st.selectbox("Group by", ["Supplier","Client","Project","Vendor","Status"])
+            st.dataframe(hist.aggregate(by, filters, incl_excluded), use_container_width=True, height=260)
+        page_size = 200
+        pages = max(1, -(-total // page_size))
+        pg = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="hist_page")
+        st.dataframe(load_history(Path("history"), page_size, (pg-1)*page_size, filters, incl_excluded), use_container_width=True)
+
+        st.subheader("Rule failures")
+        # from the weekly per-rule rollup kept alongside the history, not from the raw rows
+        r1, r2, r3 = st.columns(3)
+        with r1: rate_by = st.selectbox("Failure rate by", ["Rule","Supplier","Client","Vendor","Project","Week"])
+        with r2: trend_by = st.selectbox("Trend", ["All rules","Rule","Supplier","Client","Vendor","Project"])
+        with r3: span_weeks = st.number_input("Weeks", min_value=1, max_value=260, value=52, step=1)
+        rates = hist.failure_rates(rate_by, filters, incl_excluded, weeks=int(span_weeks))
+        if rates.empty:
+            st.info("No per-rule findings recorded in this period.")
+        else:
+            st.dataframe(rates, use_container_width=True, height=260)
+            trend = hist.failure_trend(None if trend_by == "All rules" else trend_by, 5, filters, incl_excluded, int(span_weeks))
+            st.markdown(f"**Weekly failure rate ({trend_by if trend_by == 'All rules' else f'top 5 by {trend_by.lower()}'})**")
+            st.line_chart(trend)
+
+    st.subheader("Performance")
+    if not METRICS.enabled:
+        st.caption("Stage timing is turned off (metrics.enabled in app_settings.yaml).")
+    else:
+        # per-stage timings collected by the app, job workers and indexing pool
+        spans, counters = summary()
+        if spans.empty:
+            st.info("No timings recorded yet.")
+        else:
+            st.dataframe(spans, use_container_width=True)
+            st.bar_chart(spans.set_index("Stage")["Total s"])
+        if not counters.empty: st.dataframe(counters, use_container_width=True)
+        prom = Path(metrics_cfg.get("prom_file", "cache/metrics.prom"))
+        write_prometheus(prom)
+        st.caption(f"Prometheus text export: {prom}" + (f" and http://{metrics_cfg.get('host','127.0.0.1')}:{metrics_cfg['port']}/metrics" if metrics_cfg.get("port") else ""))
+        if is_admin(token) and st.button("Reset timings"):
+            METRICS.reset(); st.rerun()
 
 # -------------- SETTINGS --------------
 with tabs[3]:
@@ -256,9 +390,8 @@ with tabs[3]:
     col1, col2 = st.columns(2)
     with col1:
         # show merged ruleset yaml for editing
-        with open("rulesets/guidance_mined.yaml","r",encoding="utf-8") as f:
-            mined = yaml.safe_load(f) or {"rules":[]}
-        base_yaml = open("rulesets/default_rules.yaml","r",encoding="utf-8").read()
+        mined = load_mined_rules()
+        base_yaml = BASE_RULES.read_text(encoding="utf-8")
         mined_yaml = yaml.safe_dump(mined, sort_keys=False, allow_unicode=True)
         st.markdown("**Base Ruleset (read-only here)**")
         st.code(base_yaml, language="yaml")
@@ -267,10 +400,16 @@ with tabs[3]:
         if st.button("Save guidance_mined.yaml"):
             try:
                 obj = yaml.safe_load(new_yaml)
-                with open("rulesets/guidance_mined.yaml","w",encoding="utf-8") as f:
-                    yaml.safe_dump(obj, f, sort_keys=False, allow_unicode=True)
+                save_mined_rules(obj)
                 st.success("Saved.")
             except Exception as e:
                 st.error(f"YAML error: {e}")
     with col2:
-        st.json(settings)
+        st.json(thaw(settings))
+        st.markdown("**Report store**")
+        rs = REPORTS.stats()
+        st.caption(f"{rs['artifacts']} artifact(s) in {rs['objects']} object(s), {rs['bytes']/1e6:.1f} MB "
+                   f"(limit {REPORTS.max_bytes/1e6:.0f} MB, {REPORTS.max_age_days:g} days)")
+        if is_admin(token) and st.button("Evict expired reports now"):
+            r = REPORTS.evict()
+            st.success(f"Evicted {r['evicted']} object(s), {r['bytes']/1e6:.1f} MB.")
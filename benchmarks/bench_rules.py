@@ -0,0 +1,53 @@
+# Run time of the compiled rule engine vs. rule count: python -m benchmarks.bench_rules
+import random, re, string, time, argparse
+
+from modules.rule_engine import CompiledRuleset
+
+WORDS = ["cabinet","antenna","feeder","earthing","bonding","mast","tower","sector","radio","power",
+         "cable","tray","ladder","rooftop","greenfield","ballast","steelwork","bracket","conduit","isolator"]
+
+def synthetic_text(pages: int, words_per_page: int = 500, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    return "\n".join(" ".join(rnd.choice(WORDS) for _ in range(words_per_page)) + " 12/03/2024 www.example.com." for _ in range(pages))
+
+def synthetic_rules(n: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    rules = []
+    for i in range(n):
+        term = " ".join(rnd.choice(WORDS) for _ in range(2)) + ("" if i % 3 else " " + "".join(rnd.choice(string.ascii_lowercase) for _ in range(6)))
+        opts = {"any": [term]}
+        if i % 10 == 0: opts["any_regex"] = [r"\b" + re.escape(rnd.choice(WORDS)) + r"\s+\w+\b"]
+        rules.append({"id": f"B{i}", "type": "doc_text_presence", "severity": "minor", "description": term, "options": opts})
+    rules.append({"id": "BDATE", "type": "doc_date_recency"})
+    rules.append({"id": "BLINK", "type": "doc_link_presence"})
+    return {"rules": rules}
+
+def naive(text: str, rules: dict) -> int:
+    n = 0
+    for r in rules["rules"]:
+        if r["type"] != "doc_text_presence": continue
+        opts = r["options"]; low = text.lower()
+        ok = any(t.lower() in low for t in opts.get("any", [])) and (not opts.get("any_regex") or any(re.search(p, text, re.I) for p in opts["any_regex"]))
+        n += not ok
+    return n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--counts", default="10,100,1000,5000")
+    ap.add_argument("--naive", action="store_true", help="also time the per-rule baseline")
+    a = ap.parse_args()
+    text = synthetic_text(a.pages)
+    print(f"text: {len(text):,} chars ({a.pages} pages)")
+    print(f"{'rules':>7} {'compile_s':>10} {'eval_s':>8}" + (f" {'naive_s':>8}" if a.naive else ""))
+    for n in [int(x) for x in a.counts.split(",")]:
+        rules = synthetic_rules(n)
+        t0 = time.perf_counter(); cr = CompiledRuleset(rules); t1 = time.perf_counter()
+        cr.evaluate(text); t2 = time.perf_counter()
+        line = f"{n:>7} {t1-t0:>10.3f} {t2-t1:>8.3f}"
+        if a.naive:
+            naive(text, rules); line += f" {time.perf_counter()-t2:>8.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
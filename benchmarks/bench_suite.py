@@ -0,0 +1,131 @@
+# End-to-end benchmarks on a synthetic corpus: python -m benchmarks.bench_suite [--files 20 --pages 10]
+# Writes one JSON file per run (throughput and peak memory per stage); --compare OLD.json prints the change.
+import argparse, gc, json, os, platform, resource, shutil, subprocess, sys, tempfile, time
+from pathlib import Path
+
+from benchmarks.bench_rules import synthetic_rules
+from benchmarks.corpus import make_corpus
+
+def _reset_peak():
+    # Linux: writing 5 to clear_refs resets VmHWM so each stage gets its own peak
+    try: Path("/proc/self/clear_refs").write_text("5")
+    except OSError: pass
+
+def _peak_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"): return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024*1024 if sys.platform == "darwin" else 1024)
+
+def measure(stage: str, fn, items: int, unit: str, nbytes: int = 0, **extra) -> dict:
+    gc.collect(); _reset_peak()
+    t0 = time.perf_counter(); fn(); dt = time.perf_counter() - t0
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / (1024*1024 if sys.platform == "darwin" else 1024)
+    row = {"stage": stage, "seconds": round(dt, 4), "items": items, "unit": unit,
+           "per_second": round(items / dt, 2) if dt else None, "peak_rss_mb": round(_peak_mb(), 1),
+           "children_peak_rss_mb": round(kids, 1), **extra}
+    if nbytes: row["mb_per_second"] = round(nbytes / 1e6 / dt, 2) if dt else None
+    print(f"{stage:<28} {dt:>9.3f}s {row['per_second'] or 0:>10.1f} {unit}/s  peak {row['peak_rss_mb']:>7.1f} MB")
+    return row
+
+def _isolate_caches(tmp: Path):
+    # fresh text/render/metrics caches so every run starts cold and the app's cache/ is untouched;
+    # the env var must be set before the first pool starts, so forkserver/spawn workers inherit it
+    from modules.text_cache import TEXT_CACHE
+    from modules.render_cache import RENDER_CACHE
+    from modules.metrics import METRICS
+    os.environ["SEKER_CACHE_DIR"] = str(tmp)
+    TEXT_CACHE.path = tmp / "text_cache.sqlite"; TEXT_CACHE._ready = False
+    RENDER_CACHE.disk_dir = tmp / "render"; RENDER_CACHE._disk_used = None
+    RENDER_CACHE._mem.clear(); RENDER_CACHE._mem_used = 0
+    METRICS.flush(); METRICS.path = tmp / "metrics.sqlite"; METRICS._ready = False
+
+def run(a) -> dict:
+    from modules.ingest import index_folder
+    from modules.doc_rules import run_doc_checks
+    from modules.rule_mining import mine_rules_from_file
+    from modules.pdf_annotate import annotate_text_matches, render_page_image
+    import fitz
+
+    tmp = Path(tempfile.mkdtemp(prefix="seker_bench_"))
+    _isolate_caches(tmp)
+    results = []
+    corpus = tmp / "corpus"; paths = []
+    results.append(measure("generate_corpus", lambda: paths.extend(make_corpus(corpus, a.files, a.pages, a.pdf_share, a.seed)),
+                           a.files, "files"))
+    nbytes = sum(p.stat().st_size for p in paths)
+    pages = a.files * a.pages
+    index = tmp / "guidance_index.sqlite"
+    results.append(measure("index_folder_cold", lambda: index_folder(corpus, index, workers=a.workers), pages, "pages", nbytes,
+                           workers=a.workers or os.cpu_count()))
+    results.append(measure("index_folder_unchanged", lambda: index_folder(corpus, index, workers=a.workers), a.files, "files"))
+
+    for n in [int(x) for x in a.rule_counts.split(",")]:
+        rules = synthetic_rules(n, a.seed)
+        results.append(measure(f"run_doc_checks_{n}_rules", lambda: [run_doc_checks(p, rules) for p in paths],
+                               pages, "pages", rules=n))
+
+    mine = paths[:a.mine_files]
+    results.append(measure("mine_rules_from_file", lambda: [mine_rules_from_file(p) for p in mine],
+                           len(mine) * a.pages, "pages"))
+
+    pdfs = [p for p in paths if p.suffix == ".pdf"]
+    if pdfs:
+        pdf = pdfs[0]
+        with fitz.open(pdf) as d:
+            n_pages = len(d)
+            matches = [{"page": i + 1, "text": w[4], "note": "bench"} for i, pg in enumerate(d)
+                       for w in pg.get_text("words")[:a.matches_per_page]]
+        matches += [{"page": 1, "text": "zz-not-present", "note": "missing"}]
+        out = tmp / "annotated.pdf"
+        results.append(measure("annotate_text_matches", lambda: annotate_text_matches(pdf, out, matches),
+                               len(matches), "matches"))
+        render = lambda: [render_page_image(pdf, i + 1, a.zoom) for i in range(n_pages)]
+        results.append(measure("render_page_image_cold", render, n_pages, "pages", zoom=a.zoom))
+        results.append(measure("render_page_image_warm", render, n_pages, "pages", zoom=a.zoom))
+    return {"stages": results, "corpus_mb": round(nbytes / 1e6, 2), "tmp": str(tmp)}
+
+def meta(a) -> dict:
+    try: commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError: commit = ""
+    return {"started": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(a).items() if k not in ("out", "compare")}}
+
+def compare(new: dict, old: dict):
+    before = {s["stage"]: s for s in old.get("stages", [])}
+    print(f"\n{'stage':<28} {'old/s':>10} {'new/s':>10} {'speedup':>8} {'peak MB':>16}")
+    for s in new["stages"]:
+        o = before.get(s["stage"])
+        if not o or not o.get("per_second") or not s.get("per_second"): continue
+        print(f"{s['stage']:<28} {o['per_second']:>10.1f} {s['per_second']:>10.1f} {s['per_second']/o['per_second']:>7.2f}x "
+              f"{o['peak_rss_mb']:>7.1f} -> {s['peak_rss_mb']:<7.1f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=20)
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--pdf-share", type=float, default=0.5)
+    ap.add_argument("--rule-counts", default="10,100,1000,10000")
+    ap.add_argument("--mine-files", type=int, default=5)
+    ap.add_argument("--matches-per-page", type=int, default=5)
+    ap.add_argument("--zoom", type=float, default=2.0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--keep", action="store_true", help="keep the generated corpus and caches")
+    ap.add_argument("--out", type=Path, default=None, help="default: benchmarks/results/bench_<timestamp>.json")
+    ap.add_argument("--compare", type=Path, default=None, help="earlier results JSON to compare against")
+    a = ap.parse_args()
+    report = {"meta": meta(a), **run(a)}
+    if not a.keep: shutil.rmtree(report.pop("tmp"), ignore_errors=True)
+    out = a.out or Path("benchmarks/results") / f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nWrote {out}")
+    if a.compare: compare(report, json.loads(a.compare.read_text()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Synthetic guidance corpus: python -m benchmarks.corpus OUT_DIR --files 20 --pages 10
+import argparse, random, zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from benchmarks.bench_rules import WORDS
+
+MODALS = ["shall", "must", "shall not", "is required to", "should", "may"]
+VERBS = ["be installed", "be bonded", "be labelled", "be fixed", "be inspected", "be isolated", "be routed"]
+
+def sentence(rnd: random.Random) -> str:
+    a, b, c = (rnd.choice(WORDS) for _ in range(3))
+    if rnd.random() < 0.4:
+        return f"The {a} {b} {rnd.choice(MODALS)} {rnd.choice(VERBS)} to the {c} in accordance with TDEE{rnd.randint(40000, 59999)}."
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 20))).capitalize() + "."
+
+def paragraphs(rnd: random.Random, pages: int, per_page: int = 12) -> list[list[str]]:
+    return [[" ".join(sentence(rnd) for _ in range(rnd.randint(2, 5))) for _ in range(per_page)] for _ in range(pages)]
+
+NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" ' \
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+def _p(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+def write_docx(path: Path, title: str, pages: list[list[str]], rnd: random.Random):
+    body = []
+    for i, paras in enumerate(pages):
+        body += [_p(t) for t in paras]
+        rows = "".join("<w:tr>" + "".join(f"<w:tc>{_p(rnd.choice(WORDS) + ' ' + str(rnd.randint(1, 99)))}</w:tc>" for _ in range(3)) + "</w:tr>"
+                       for _ in range(4))
+        body.append(f"<w:tbl>{rows}</w:tbl>")
+        if i < len(pages) - 1: body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    sect = '<w:sectPr><w:headerReference w:type="default" r:id="rIdH"/><w:footerReference w:type="default" r:id="rIdF"/></w:sectPr>'
+    parts = {
+        "[Content_Types].xml": '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>'
+            '<Override PartName="/word/footer1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/></Types>',
+        "_rels/.rels": '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/></Relationships>',
+        "word/_rels/document.xml.rels": '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rIdH" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>'
+            '<Relationship Id="rIdF" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer" Target="footer1.xml"/></Relationships>',
+        "word/document.xml": f'<?xml version="1.0" encoding="UTF-8"?><w:document {NS}><w:body>{"".join(body)}{sect}</w:body></w:document>',
+        "word/header1.xml": f'<?xml version="1.0" encoding="UTF-8"?><w:hdr {NS}>{_p(title + " Version 1." + str(rnd.randint(0, 9)) + " Issued 12/03/2024")}</w:hdr>',
+        "word/footer1.xml": f'<?xml version="1.0" encoding="UTF-8"?><w:ftr {NS}>{_p(title + " www.example.com")}</w:ftr>',
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in parts.items(): z.writestr(name, data)
+
+def write_pdf(path: Path, title: str, pages: list[list[str]]):
+    import fitz
+    doc = fitz.open()
+    for paras in pages:
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, page.rect.width - 36, page.rect.height - 36),
+                            title + "\n\n" + "\n".join(paras), fontsize=8)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+def make_corpus(out: Path, files: int = 20, pages: int = 10, pdf_share: float = 0.5, seed: int = 0) -> list[Path]:
+    # files are named like real guidance (TDEE4xxxx/TDEE5xxxx) so series/key extraction has work to do
+    rnd = random.Random(seed); out = Path(out); out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(files):
+        title = f"TDEE{4 if i % 2 else 5}{i:04d} Synthetic guidance {i}"
+        pdf = rnd.random() < pdf_share
+        path = out / f"{title.split()[0]}_v1.{i % 7} Synthetic {i}.{'pdf' if pdf else 'docx'}"
+        body = paragraphs(rnd, pages)
+        write_pdf(path, title, body) if pdf else write_docx(path, title, body, rnd)
+        paths.append(path)
+    return paths
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--files", type=int, default=20)
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--pdf-share", type=float, default=0.5)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+    paths = make_corpus(a.out, a.files, a.pages, a.pdf_share, a.seed)
+    print(f"Wrote {len(paths)} file(s), {sum(p.stat().st_size for p in paths)/1e6:.1f} MB to {a.out}")
+
+if __name__ == "__main__":
+    main()
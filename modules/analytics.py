@@ -1,10 +1,10 @@
 from pathlib import Path
 import pandas as pd
+from .history_store import open_history
 
-def load_history(history_dir: Path = Path("history")):
-    rows = []
-    for p in sorted(history_dir.glob("history_*.csv")):
-        try:
-            df = pd.read_csv(p); df["source"] = p.name; rows.append(df)
-        except Exception: pass
-    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+def history_store(history_dir: Path = Path("history")):
+    return open_history(Path(history_dir) / "history.sqlite")
+
+def load_history(history_dir: Path = Path("history"), limit: int = 200, offset: int = 0,
+                 filters: dict | None = None, include_excluded: bool = True) -> pd.DataFrame:
+    return history_store(history_dir).page(limit, offset, filters, include_excluded)
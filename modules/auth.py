@@ -1,9 +1,8 @@
 from pathlib import Path
-import yaml
+from .config_store import load_yaml
 SETTINGS = Path("rulesets/app_settings.yaml")
 def get_settings():
-    with open(SETTINGS, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return load_yaml(SETTINGS, {})
 def is_admin(token: str) -> bool:
     s = get_settings()
     return bool(token) and token == s.get("admin",{}).get("passphrase","")
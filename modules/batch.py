@@ -0,0 +1,140 @@
+import os, sys, time, zipfile, tempfile, shutil, argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+
+from .config_store import thaw
+from .metrics import METRICS
+from .pools import init_worker, mp_context, worker_settings
+from .doc_rules import load_ruleset, select_rules, CONTEXT_DIMS
+from .ingest import extract_segments, section_texts, document_features
+from .rule_engine import compile_ruleset
+
+# Headless batch audit: python -m modules.batch <folder|zip> -o findings.{csv,parquet,xlsx}
+# Files are audited in a process pool against one compiled ruleset and the findings
+# are streamed into a single consolidated output as each file completes.
+
+AUDIT_EXTS = {".pdf", ".docx"}
+COLUMNS = ["File", "Rule", "Description", "Severity", "Detail"]
+
+def collect_inputs(src: Path, workdir: Path) -> list[tuple[str, Path]]:
+    src = Path(src)
+    if src.is_file() and src.suffix.lower() == ".zip":
+        out = []
+        with zipfile.ZipFile(src) as z:
+            for info in z.infolist():
+                if info.is_dir() or Path(info.filename).suffix.lower() not in AUDIT_EXTS: continue
+                dest = workdir / f"{len(out):06d}{Path(info.filename).suffix.lower()}"
+                with z.open(info) as fi, open(dest, "wb") as fo: shutil.copyfileobj(fi, fo, 1024*1024)
+                out.append((info.filename, dest))
+        return out
+    return [(str(p.relative_to(src)), p) for p in sorted(src.rglob("*"))
+            if p.is_file() and p.suffix.lower() in AUDIT_EXTS]
+
+_RULES = None
+
+def _init_worker(rules: dict):
+    global _RULES
+    _RULES = compile_ruleset(rules)
+
+def _audit_one(item) -> tuple[str, list[dict], int]:
+    name, path = item
+    segments = extract_segments(path)
+    sections = section_texts(segments) if path.suffix.lower()==".docx" else None
+    features = document_features(path, _RULES.features) if _RULES.features else None
+    findings = _RULES.evaluate("\n".join(t for _, t in segments), sections, features)
+    return name, [{"File": name, **f} for f in findings], os.path.getsize(path)
+
+class FindingsWriter:
+    def __init__(self, out: Path, fmt: str | None = None):
+        self.out = Path(out); self.fmt = (fmt or self.out.suffix.lstrip(".") or "csv").lower()
+        self.out.parent.mkdir(parents=True, exist_ok=True)
+        self.rows = 0; self._pq = None; self._wb = None
+        if self.fmt == "csv":
+            pd.DataFrame(columns=COLUMNS).to_csv(self.out, index=False)
+        elif self.fmt == "xlsx":
+            from openpyxl import Workbook
+            self._wb = Workbook(write_only=True); self._ws = self._wb.create_sheet("Findings"); self._ws.append(COLUMNS)
+        elif self.fmt == "parquet":
+            try:
+                import pyarrow as pa, pyarrow.parquet as pq
+            except ImportError as e:
+                raise RuntimeError("Parquet output needs pyarrow; use .csv or .xlsx instead.") from e
+            self._schema = pa.schema([(c, pa.string()) for c in COLUMNS])
+            self._pq = pq.ParquetWriter(self.out, self._schema)
+        else:
+            raise ValueError(f"Unsupported output format: {self.fmt}")
+
+    def write(self, rows: list[dict]):
+        if not rows: return
+        with METRICS.span(f"export.{self.fmt}"):
+            df = pd.DataFrame(rows, columns=COLUMNS).astype(str)
+            if self.fmt == "csv":
+                df.to_csv(self.out, mode="a", header=False, index=False)
+            elif self.fmt == "xlsx":
+                for r in df.itertuples(index=False): self._ws.append(list(r))
+            else:
+                import pyarrow as pa
+                self._pq.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.rows += len(rows)
+
+    def close(self):
+        with METRICS.span(f"export.{self.fmt}"):
+            if self._wb is not None: self._wb.save(self.out)
+            if self._pq is not None: self._pq.close()
+
+def audit_batch(src: Path, out: Path, rules: dict | None = None, workers: int | None = None,
+                fmt: str | None = None, progress=None, context: dict | None = None) -> dict:
+    # progress(done, total, name, stats) is called after each file
+    rules = rules if rules is not None else load_ruleset()
+    rules = thaw(select_rules(rules, context) if context else rules)
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    stats = {"files": 0, "findings": 0, "bytes": 0, "seconds": 0.0, "files_per_s": 0.0, "output": str(out)}
+    with tempfile.TemporaryDirectory(prefix="batch_") as tmp:
+        items = collect_inputs(Path(src), Path(tmp))
+        writer = FindingsWriter(out, fmt)
+        ex = None
+        try:
+            if workers <= 1 or len(items) <= 1:
+                _init_worker(rules); results = map(_audit_one, items)
+            else:
+                ex = ProcessPoolExecutor(max_workers=min(workers, len(items)), mp_context=mp_context(),
+                                         initializer=init_worker, initargs=(worker_settings(), _init_worker, rules))
+                results = ex.map(_audit_one, items, chunksize=max(1, len(items)//(workers*8)))
+            for name, rows, size in results:
+                writer.write(rows)
+                stats["files"] += 1; stats["findings"] += len(rows); stats["bytes"] += size
+                stats["seconds"] = time.perf_counter() - t0
+                stats["files_per_s"] = stats["files"] / stats["seconds"] if stats["seconds"] else 0.0
+                if progress: progress(stats["files"], len(items), name, stats)
+        finally:
+            writer.close()
+            if ex: ex.shutdown(cancel_futures=True)
+    return stats
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m modules.batch", description="Audit a folder or ZIP of DOCX/PDF files.")
+    ap.add_argument("src", type=Path, help="directory or .zip of documents")
+    ap.add_argument("-o", "--out", type=Path, default=Path("reports/batch_findings.csv"), help=".csv, .parquet or .xlsx")
+    ap.add_argument("-w", "--workers", type=int, default=None)
+    ap.add_argument("-q", "--quiet", action="store_true")
+    ap.add_argument("-c", "--context", action="append", default=[], metavar="KEY=VALUE",
+                    help=f"only apply rules for this site context; KEY is one of {', '.join(CONTEXT_DIMS)}")
+    a = ap.parse_args(argv)
+    context = dict(kv.split("=", 1) for kv in a.context if "=" in kv)
+    if set(context) - set(CONTEXT_DIMS): ap.error(f"unknown context key(s): {', '.join(sorted(set(context) - set(CONTEXT_DIMS)))}")
+    def report(done, total, name, s):
+        if not a.quiet:
+            print(f"\r[{done}/{total}] {s['files_per_s']:.1f} files/s, {s['bytes']/s['seconds']/1e6 if s['seconds'] else 0:.1f} MB/s — {name[:60]:<60}",
+                  end="", file=sys.stderr, flush=True)
+    try:
+        stats = audit_batch(a.src, a.out, workers=a.workers, progress=report, context=context)
+    except (RuntimeError, ValueError) as e:
+        ap.error(str(e))
+    if not a.quiet: print(file=sys.stderr)
+    print(f"{stats['files']} file(s), {stats['findings']} finding(s) in {stats['seconds']:.1f}s "
+          f"({stats['files_per_s']:.1f} files/s) → {stats['output']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import sqlite3, threading
+from contextlib import contextmanager
+from pathlib import Path
+import pandas as pd
+
+# SQLite guidance catalog (replaces guidance_index.csv). One row per (file, sha256);
+# `vkey` is a sortable form of `version` so supersede runs as an indexed MAX per key.
+# docs_fts mirrors docs.id as rowid and holds the full extracted text for search.
+
+COLUMNS = ["file","key","series","version","sha256","size_bytes","title_guess","active","indexed_at","mtime_ns"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY, file TEXT NOT NULL, key TEXT, series TEXT, version TEXT, vkey TEXT,
+    sha256 TEXT NOT NULL, size_bytes INTEGER, title_guess TEXT, active INTEGER DEFAULT 1,
+    indexed_at INTEGER, mtime_ns INTEGER, UNIQUE (file, sha256));
+CREATE INDEX IF NOT EXISTS docs_key ON docs(key, vkey);
+CREATE INDEX IF NOT EXISTS docs_series ON docs(series);
+CREATE INDEX IF NOT EXISTS docs_version ON docs(version);
+CREATE INDEX IF NOT EXISTS docs_file ON docs(file, indexed_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(file UNINDEXED, title, body);
+"""
+
+def version_key(v) -> str:
+    try:
+        parts = tuple(int(x) for x in (v or "0").split("."))
+    except (ValueError, AttributeError):
+        parts = (0,)
+    return ".".join(f"{x:06d}" for x in parts)
+
+class Catalog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as c:
+            c.execute("PRAGMA journal_mode=WAL"); c.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        c = sqlite3.connect(self.path, timeout=30)
+        try:
+            with c: yield c
+        finally:
+            c.close()
+
+    def count(self) -> int:
+        with self.connect() as c:
+            return c.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def clear(self):
+        with self.connect() as c:
+            c.execute("DELETE FROM docs"); c.execute("DELETE FROM docs_fts")
+
+    def latest_by_file(self) -> dict:
+        with self.connect() as c:
+            rows = c.execute("SELECT file, size_bytes, mtime_ns, sha256 FROM docs ORDER BY indexed_at, id").fetchall()
+        return {f: {"size_bytes": s, "mtime_ns": m, "sha256": h} for f, s, m, h in rows}
+
+    def touch(self, rows: list[dict]):
+        with self.connect() as c:
+            c.executemany("UPDATE docs SET mtime_ns=:mtime_ns, indexed_at=:indexed_at WHERE file=:file AND sha256=:sha256", rows)
+
+    def upsert(self, rows: list[dict], texts: dict | None = None) -> set:
+        # texts: {file: full text} for the FTS table; returns the keys whose supersede state may change
+        texts = texts or {}
+        with self.connect() as c:
+            for r in rows:
+                r = {k: r.get(k) for k in COLUMNS}
+                r["vkey"] = version_key(r["version"]); r["active"] = int(bool(r["active"]) if r["active"] is not None else 1)
+                (doc_id,) = c.execute("""
+                    INSERT INTO docs (file,key,series,version,vkey,sha256,size_bytes,title_guess,active,indexed_at,mtime_ns)
+                    VALUES (:file,:key,:series,:version,:vkey,:sha256,:size_bytes,:title_guess,:active,:indexed_at,:mtime_ns)
+                    ON CONFLICT (file, sha256) DO UPDATE SET key=excluded.key, series=excluded.series,
+                        version=excluded.version, vkey=excluded.vkey, size_bytes=excluded.size_bytes,
+                        title_guess=excluded.title_guess, active=excluded.active,
+                        indexed_at=excluded.indexed_at, mtime_ns=excluded.mtime_ns
+                    RETURNING id""", r).fetchone()
+                c.execute("DELETE FROM docs_fts WHERE rowid=?", (doc_id,))
+                c.execute("INSERT INTO docs_fts (rowid, file, title, body) VALUES (?,?,?,?)",
+                          (doc_id, r["file"], r["title_guess"] or "", texts.get(r["file"], "")))
+        return {r.get("key") for r in rows}
+
+    def supersede(self, keys=None):
+        sql = "UPDATE docs SET active = (vkey = (SELECT MAX(d.vkey) FROM docs d WHERE d.key = docs.key))"
+        with self.connect() as c:
+            if keys is None:
+                c.execute(sql)
+            else:
+                keys = [k for k in keys if k is not None]
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i+500]
+                    c.execute(sql + f" WHERE key IN ({','.join('?'*len(chunk))})", chunk)
+
+    def frame(self, active_only: bool = False, series: str | None = None) -> pd.DataFrame:
+        sql = f"SELECT {','.join(COLUMNS)} FROM docs"
+        where, args = [], []
+        if active_only: where.append("active=1")
+        if series: where.append("series=?"); args.append(series)
+        if where: sql += " WHERE " + " AND ".join(where)
+        with self.connect() as c:
+            df = pd.read_sql_query(sql + " ORDER BY key, vkey", c, params=args)
+        df["active"] = df["active"].astype(bool)
+        return df
+
+    def files(self, active_only: bool = False) -> list[str]:
+        with self.connect() as c:
+            sql = "SELECT DISTINCT file FROM docs" + (" WHERE active=1" if active_only else "") + " ORDER BY file"
+            return [r[0] for r in c.execute(sql)]
+
+    def search(self, query: str, limit: int = 50, active_only: bool = True) -> pd.DataFrame:
+        sql = """SELECT d.file, d.key, d.series, d.version, d.active,
+                        snippet(docs_fts, 2, '[', ']', ' … ', 12) AS snippet, bm25(docs_fts) AS score
+                 FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid
+                 WHERE docs_fts MATCH ?""" + (" AND d.active=1" if active_only else "") + " ORDER BY score LIMIT ?"
+        with self.connect() as c:
+            try:
+                return pd.read_sql_query(sql, c, params=[query, limit])
+            except (sqlite3.OperationalError, pd.errors.DatabaseError):
+                # fall back to a quoted phrase when the query isn't valid FTS syntax
+                return pd.read_sql_query(sql, c, params=['"' + query.replace('"', '""') + '"', limit])
+
+    def migrate_csv(self, csv_path: Path, root: Path | None = None) -> int:
+        from .ingest import extract_text, guidance_source
+        df = pd.read_csv(csv_path, dtype={"version": str, "key": str})
+        df = df.astype(object).where(df.notna(), None)
+        rows = df.to_dict("records")
+        texts = {}
+        if root is not None:
+            for r in rows:
+                texts[r["file"]] = extract_text(guidance_source(root, r["file"]))
+        self.upsert(rows, texts)
+        return len(rows)
+
+_OPEN: dict = {}
+_LOCK = threading.Lock()
+
+def open_catalog(path: Path, root: Path | None = None) -> Catalog:
+    # first open of a new catalog imports a sibling legacy guidance_index.csv, if any
+    path = Path(path); k = str(path.resolve())
+    with _LOCK:
+        cat = _OPEN.get(k)
+        if cat is None or not path.exists():
+            is_new = not path.exists()
+            cat = _OPEN[k] = Catalog(path)
+            legacy = path.with_suffix(".csv")
+            if is_new and legacy.exists():
+                cat.migrate_csv(legacy, root)
+    return cat
@@ -0,0 +1,73 @@
+import os, hashlib, threading, tempfile, yaml
+from pathlib import Path
+from types import MappingProxyType
+
+# Process-wide YAML cache: each file is parsed once and re-parsed only when its
+# mtime/size changes and the content hash differs. Values are frozen so that
+# every Streamlit session can share the same object safely.
+
+def freeze(obj):
+    if isinstance(obj, dict): return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)): return tuple(freeze(v) for v in obj)
+    return obj
+
+def thaw(obj):
+    if isinstance(obj, (dict, MappingProxyType)): return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return [thaw(v) for v in obj]
+    return obj
+
+class YamlStore:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _stat(self, path: Path):
+        try:
+            st = path.stat(); return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def load(self, path: Path, default=None):
+        path = Path(path); key = str(path.resolve())
+        stat = self._stat(path)
+        e = self._entries.get(key)
+        if e and e["stat"] == stat: return e["value"], e["sha"]
+        with self._lock:
+            e = self._entries.get(key)
+            if e and e["stat"] == stat: return e["value"], e["sha"]
+            if stat is None:
+                value, sha = freeze(default), ""
+            else:
+                raw = path.read_bytes()
+                sha = hashlib.sha256(raw).hexdigest()
+                if e and e["sha"] == sha:
+                    value = e["value"]
+                else:
+                    value = freeze(yaml.safe_load(raw.decode("utf-8")) or default)
+            self._entries[key] = {"stat": stat, "sha": sha, "value": value}
+            return value, sha
+
+    def save(self, path: Path, obj):
+        path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                yaml.safe_dump(thaw(obj), f, sort_keys=False, allow_unicode=True)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp): os.unlink(tmp)
+            raise
+        self.invalidate(path)
+
+    def invalidate(self, path: Path = None):
+        with self._lock:
+            if path is None: self._entries.clear()
+            else: self._entries.pop(str(Path(path).resolve()), None)
+
+STORE = YamlStore()
+
+def load_yaml(path: Path, default=None):
+    return STORE.load(path, default)[0]
+
+def save_yaml(path: Path, obj):
+    STORE.save(path, obj)
@@ -0,0 +1,141 @@
+import os, re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+from .ocr import page_words
+from .metrics import METRICS
+from .pools import init_worker, mp_context, worker_settings
+from .ingest import as_source, open_pdf, pdf_buffer
+
+# Design (drawing PDF) audit: every page's words are extracted once, indexed by
+# normalised token, and every pdf_text_presence term is looked up in that index.
+# Pages are split into contiguous chunks and processed across a process pool;
+# scanned sheets without a text layer fall back to OCR words (see ocr.page_words).
+
+# Matching follows page.search_for, which the audit used before the word index: a term is
+# found where its text occurs case-insensitively, inside longer words included, with any run
+# of punctuation/whitespace treated as one separator. Both sides are split into alphanumeric
+# tokens, so "NORTH-ARROW", "north/arrow" and "North Arrow" all match the term "north arrow",
+# and "ARROWS" matches "arrow". A term's first token may end a page token, its last token may
+# start one, and tokens in between must match whole.
+TOKEN = re.compile(r"[^\W_]+", re.U)
+
+def tokens(text: str) -> list[str]:
+    return [t.lower() for t in TOKEN.findall(text or "")]
+
+def design_terms(rules: dict) -> list[dict]:
+    out = []
+    for r in rules.get("rules", []):
+        if r.get("type") != "pdf_text_presence": continue
+        for t in (r.get("options", {}) or {}).get("any", []):
+            toks = tokens(t)
+            if toks: out.append({"rule": r.get("id"), "term": t, "tokens": tuple(toks)})
+    return out
+
+def _starts(toks, seq, pos) -> list[int]:
+    # page token positions where toks could begin (see the matching note above)
+    first = toks[0]
+    if len(toks) == 1: return sorted(i for t, idx in pos.items() if first in t for i in idx)
+    return sorted(i for t, idx in pos.items() if t.endswith(first) for i in idx)
+
+def _match_page(words, term_tokens) -> dict:
+    # words: fitz "words" tuples; returns {tokens: [rect, ...]} for each term present
+    seq, boxes = [], []
+    for w in words:
+        for t in tokens(w[4]):
+            seq.append(t); boxes.append(w[:4])
+    pos = {}
+    for i, t in enumerate(seq): pos.setdefault(t, []).append(i)
+    hits = {}
+    for toks in term_tokens:
+        n = len(toks); rects = []
+        for i in _starts(toks, seq, pos):
+            if n > 1 and (seq[i+1:i+n-1] != list(toks[1:-1]) or i + n > len(seq) or not seq[i+n-1].startswith(toks[-1])):
+                continue
+            bs = boxes[i:i+n]
+            rects.append((min(b[0] for b in bs), min(b[1] for b in bs), max(b[2] for b in bs), max(b[3] for b in bs)))
+            if len(rects) >= 16: break
+        if rects: hits[toks] = rects
+    return hits
+
+_SCAN = {}   # per process: the open document and the term tokens, set by _init_scan
+
+def _init_scan(src, term_tokens):
+    # pool initializer (and the serial path): the document is sent and opened once per worker
+    import fitz
+    if _SCAN.get("doc") is not None: _SCAN["doc"].close()
+    _SCAN["doc"] = fitz.open(stream=src, filetype="pdf") if isinstance(src, (bytes, bytearray)) else fitz.open(src)
+    _SCAN["terms"] = term_tokens
+
+def _scan_pages(span):
+    first, last = span
+    doc, terms = _SCAN["doc"], _SCAN["terms"]
+    return [(n + 1, _match_page(page_words(doc[n]), terms)) for n in range(first, last)]
+
+def page_count(pdf_path) -> int:
+    with open_pdf(pdf_path) as d: return len(d)
+
+def scan_design(pdf_path: Path, term_tokens, workers: int | None = None, pages_per_task: int = 4) -> dict:
+    n = page_count(pdf_path)
+    workers = workers or os.cpu_count() or 1
+    step = max(1, min(pages_per_task, -(-n // workers)))
+    spans = [(i, min(n, i + step)) for i in range(0, n, step)]
+    parallel = workers > 1 and len(spans) > 1 and n > 8
+    src = as_source(pdf_path); spill = None
+    if isinstance(src, Path): src = str(src)
+    elif parallel:
+        # in-memory (or zip member) PDFs go to one temp file, so workers get a path, not a copy each
+        from .report_store import REPORTS
+        spill = REPORTS.tmp_path(".pdf")
+        with open(spill, "wb") as f: f.write(src.read_bytes())
+        src = str(spill)
+    else: src = pdf_buffer(src.read_bytes())
+    try:
+        with METRICS.span("design.scan") as s:
+            s.pages = n
+            if not parallel:
+                _init_scan(src, term_tokens)
+                try: chunks = [_scan_pages(t) for t in spans]
+                finally: _SCAN.pop("doc").close(); _SCAN.clear()
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(spans)), mp_context=mp_context(),
+                                         initializer=init_worker, initargs=(worker_settings(), _init_scan, src, term_tokens)) as ex:
+                    chunks = list(ex.map(_scan_pages, spans))
+    finally:
+        if spill: spill.unlink(missing_ok=True)
+    return {page: hits for chunk in chunks for page, hits in chunk}
+
+def audit_design(pdf_path: Path, rules: dict, workers: int | None = None, context: dict | None = None) -> dict:
+    if context:
+        from .doc_rules import select_rules
+        rules = select_rules(rules, context)
+    terms = design_terms(rules)
+    meta = {r.get("id"): r for r in rules.get("rules", []) if r.get("type") == "pdf_text_presence"}
+    pages = scan_design(pdf_path, sorted({t["tokens"] for t in terms}), workers) if terms else {}
+    per_page, marks = [], []
+    found_anywhere = {}
+    for page, hits in sorted(pages.items()):
+        by_rule = {}
+        for t in terms:
+            rects = hits.get(t["tokens"], [])
+            by_rule.setdefault(t["rule"], [])
+            if rects: by_rule[t["rule"]].append(t["term"])
+            for rect in rects:
+                marks.append({"page": page, "rect": rect, "note": f"{t['rule']}: {t['term']}"})
+        for rid, found in by_rule.items():
+            r = meta[rid]
+            found_anywhere[rid] = found_anywhere.get(rid, False) or bool(found)
+            per_page.append({"Page": page, "RuleID": rid, "Description": r.get("description",""),
+                             "Severity": r.get("severity","minor"), "Status": "Pass" if found else "Fail",
+                             "Found": ", ".join(found)})
+    missing, results = [], []
+    for rid in dict.fromkeys(t["rule"] for t in terms):
+        r = meta[rid]
+        results.append({"RuleID": rid, "Severity": r.get("severity","minor"), "Status": "Pass" if found_anywhere.get(rid) else "Fail"})
+        if found_anywhere.get(rid): continue
+        for t in (r.get("options", {}) or {}).get("any", []):
+            missing.append({"RuleID": rid, "Description": r.get("description",""), "Anchor": t,
+                            "Severity": r.get("severity","minor"), "Decision": "", "Source": "pdf_text_presence"})
+            marks.append({"page": 1, "rect": None, "note": f"[Missing] {rid}: {t}"})
+    return {"pages": len(pages), "per_page": pd.DataFrame(per_page), "rejections": pd.DataFrame(missing),
+            "results": pd.DataFrame(results), "marks": marks}
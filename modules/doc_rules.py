@@ -1,67 +1,97 @@
-import re, yaml
+import hashlib
+from collections.abc import Mapping
+from itertools import product
 from pathlib import Path
+from types import MappingProxyType
 import pandas as pd
-from .ingest import docx_text, pdf_text
+from .ingest import extract_segments, section_texts, as_source, document_features
+from .rule_engine import compile_ruleset, DOC_TYPES
+from .config_store import STORE, load_yaml, save_yaml, thaw
+
+BASE_RULES = Path("rulesets/default_rules.yaml")
+MINED_RULES = Path("rulesets/guidance_mined.yaml")
+RULE_TYPES = DOC_TYPES | {"pdf_text_presence"}
+_MERGED: dict = {}
+_INDEXES: dict = {}
+
+# rule "context" keys -> the app_settings.yaml ui list each one is chosen from
+CONTEXT_DIMS = {"project": "projects", "site_type": "site_types", "vendor": "vendors", "radio": "radio_locations"}
+
+def valid_rule(r) -> bool:
+    return isinstance(r, Mapping) and r.get("id") is not None and r.get("type") in RULE_TYPES \
+        and isinstance(r.get("options") or {}, Mapping)
 
 def load_ruleset(paths=None):
-    # merge default + guidance_mined
-    base = Path("rulesets/default_rules.yaml")
-    mined = Path("rulesets/guidance_mined.yaml")
-    out = {"rules": []}
-    for p in [base, mined]:
-        if p.exists():
-            with open(p,"r",encoding="utf-8") as f:
-                y = yaml.safe_load(f) or {}
-                out.setdefault("rules",[])
-                out["rules"].extend(y.get("rules",[]) if "rules" in y else y.get("rules",[]))
-    return out
+    # merge default + guidance_mined; parsed once per file content and shared read-only
+    paths = [Path(p) for p in (paths or [BASE_RULES, MINED_RULES])]
+    loaded = [(str(p),) + STORE.load(p, {}) for p in paths]
+    key = tuple((p, sha) for p, _, sha in loaded)
+    rs = _MERGED.get(key)
+    if rs is None:
+        rules = [r for _, y, _ in loaded if isinstance(y, Mapping) for r in (y.get("rules") or ())]
+        valid = tuple(r for r in rules if valid_rule(r))
+        version = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+        rs = MappingProxyType({"rules": valid, "version": version, "skipped": len(rules) - len(valid)})
+        _MERGED.clear(); _MERGED[key] = rs
+    return rs
+
+def _ctx_values(v) -> tuple:
+    if v in (None, "", [], ()): return (None,)
+    return tuple(str(x).strip().lower() for x in (v if isinstance(v, (list, tuple)) else [v]))
+
+class RuleIndex:
+    # rules bucketed by (project, site_type, vendor, radio) context, None meaning "any"; a selection
+    # only visits the buckets that can match, so its cost follows the relevant rules, not the total
+    def __init__(self, ruleset):
+        self.ruleset = ruleset; self.version = ruleset["version"]
+        self.buckets: dict = {}; self.values = [set() for _ in CONTEXT_DIMS]; self._subsets: dict = {}
+        for i, r in enumerate(ruleset["rules"]):
+            ctx = r.get("context") if isinstance(r.get("context"), Mapping) else {}
+            for key in product(*(_ctx_values(ctx.get(d)) for d in CONTEXT_DIMS)):
+                self.buckets.setdefault(key, []).append(i)
+                for vals, v in zip(self.values, key):
+                    if v is not None: vals.add(v)
+
+    def select(self, context: dict | None):
+        # unset dimensions don't filter; returns the full ruleset when nothing is set
+        want = tuple(_ctx_values((context or {}).get(d))[0] for d in CONTEXT_DIMS)
+        if all(v is None for v in want): return self.ruleset
+        sub = self._subsets.get(want)
+        if sub is None:
+            choices = [(v, None) if v is not None else (None, *vals) for v, vals in zip(want, self.values)]
+            idx = sorted({i for key in product(*choices) for i in self.buckets.get(key, ())})
+            tag = hashlib.sha256(repr(want).encode("utf-8")).hexdigest()[:8]
+            sub = MappingProxyType({"rules": tuple(self.ruleset["rules"][i] for i in idx),
+                                    "version": f"{self.version}:{tag}", "skipped": self.ruleset.get("skipped", 0),
+                                    "context": dict(zip(CONTEXT_DIMS, want))})
+            if len(self._subsets) > 256: self._subsets.clear()
+            self._subsets[want] = sub
+        return sub
+
+def rule_index(ruleset) -> RuleIndex:
+    v = ruleset.get("version") or hashlib.sha256(repr(ruleset.get("rules")).encode("utf-8")).hexdigest()[:16]
+    ix = _INDEXES.get(v)
+    if ix is None:
+        if len(_INDEXES) > 8: _INDEXES.clear()
+        ix = _INDEXES[v] = RuleIndex(ruleset if ruleset.get("version") else {**ruleset, "version": v})
+    return ix
 
-def extract_text(path: Path) -> str:
-    if path.suffix.lower()==".docx": return docx_text(path)
-    if path.suffix.lower()==".pdf": return pdf_text(path)
-    return ""
+def select_rules(ruleset, context: dict | None):
+    return rule_index(ruleset).select(context)
 
-def run_doc_checks(doc_path: Path, rules: dict) -> pd.DataFrame:
-    text = extract_text(doc_path) or ""
-    findings = []
-    link_like = re.findall(r'https?://\S+|\b\w+\.\w{2,}\b', text, flags=re.I)
+def load_mined_rules() -> dict:
+    y = thaw(load_yaml(MINED_RULES, {"rules": []})) or {}
+    y.setdefault("rules", [])
+    return y
 
-    def recentish(dtstr: str):
-        import datetime as dt
-        for fmt in ("%d/%m/%Y","%d/%m/%y","%d-%m-%Y","%d-%m-%y","%Y-%m-%d"):
-            try:
-                d = dt.datetime.strptime(dtstr, fmt)
-                return (dt.datetime.now()-d).days
-            except: pass
-        return None
+def save_mined_rules(obj):
+    save_yaml(MINED_RULES, obj)
 
-    for r in rules.get("rules", []):
-        rtype = r.get("type")
-        rid = r.get("id")
-        desc = r.get("description","")
-        sev = r.get("severity","minor")
-        ok = True; detail = ""
-        if rtype=="doc_text_presence":
-            opts = r.get("options", {})
-            any_terms = [t.lower() for t in opts.get("any", [])]
-            all_terms = [t.lower() for t in opts.get("all", [])]
-            any_regex = opts.get("any_regex", [])
-            ok_any = True if not any_terms else any(t in text.lower() for t in any_terms)
-            ok_all = True if not all_terms else all(t in text.lower() for t in all_terms)
-            ok_rgx = True if not any_regex else any(re.search(p, text, re.I) for p in any_regex)
-            ok = ok_any and ok_all and ok_rgx
-            if not ok: detail = "Missing terms/regex"
-        elif rtype=="doc_date_recency":
-            ds = re.findall(r'\b(\d{1,2}[\/-]\d{1,2}[\/-]\d{2,4}|\d{4}-\d{2}-\d{2})\b', text)
-            if not ds: ok=False; detail="No date string found."
-            else:
-                ages = [recentish(d) for d in ds if recentish(d) is not None]
-                if ages and min(ages)>730: ok=False; detail="Latest date appears older than 2 years."
-        elif rtype=="doc_link_presence":
-            ok = bool(link_like); 
-            if not ok: detail="No link-like strings found."
-        else:
-            continue
-        if not ok:
-            findings.append({"Rule": rid, "Description": desc, "Severity": sev, "Detail": detail})
-    return pd.DataFrame(findings)
+def run_doc_checks(doc_path: Path, rules: dict, context: dict | None = None) -> pd.DataFrame:
+    if context: rules = select_rules(rules, context)
+    segments = extract_segments(doc_path)
+    text = "\n".join(t for _, t in segments)
+    sections = section_texts(segments) if as_source(doc_path).suffix.lower()==".docx" else None
+    cr = compile_ruleset(rules)
+    features = document_features(doc_path, cr.features) if cr.features else None
+    return pd.DataFrame(cr.evaluate(text, sections, features))
@@ -0,0 +1,57 @@
+import re, zipfile
+import xml.etree.ElementTree as ET
+
+# Incremental DOCX text extraction: each part is parsed with iterparse and finished
+# paragraphs/tables are dropped from the tree as they are emitted, so memory stays
+# bounded by the largest single paragraph or table row rather than the document.
+# Yields (section, text) with section in header / body / table / footer / footnote.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+PART_ORDER = [(re.compile(r"word/header\d*\.xml$"), "header"), (re.compile(r"word/document\.xml$"), "body"),
+              (re.compile(r"word/footer\d*\.xml$"), "footer"), (re.compile(r"word/(footnotes|endnotes)\.xml$"), "footnote")]
+SECTIONS = ("header", "body", "table", "footer", "footnote")
+
+def _parts(z: zipfile.ZipFile):
+    names = z.namelist()
+    for rx, section in PART_ORDER:
+        for n in sorted(n for n in names if rx.match(n)):
+            yield n, section
+
+def iter_part(fileobj, section: str):
+    stack, para, cell, table_depth = [], [], [], 0
+    for event, el in ET.iterparse(fileobj, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            if el.tag == W + "tbl": table_depth += 1
+            continue
+        stack.pop()
+        tag = el.tag
+        if tag == W + "t":
+            para.append(el.text or "")
+        elif tag == W + "tab" and stack and stack[-1].tag == W + "r":
+            para.append("\t")
+        elif tag in (W + "br", W + "cr"):
+            para.append("\n")
+        elif tag == W + "p":
+            text = "".join(para).strip(); para = []
+            if table_depth:
+                if text: cell.append(text)
+            elif text:
+                yield section, text
+        elif tag == W + "tc":
+            text = "\n".join(cell); cell = []
+            if text: yield ("table" if section == "body" else section), text
+        elif tag == W + "tbl":
+            table_depth -= 1
+        if tag in (W + "p", W + "tbl", W + "tc", W + "tr", W + "r"):
+            el.clear()
+            if stack and tag in (W + "p", W + "tbl"):
+                try: stack[-1].remove(el)
+                except ValueError: pass
+
+def iter_docx(src):
+    # src: path or binary file object
+    with zipfile.ZipFile(src) as z:
+        for name, section in _parts(z):
+            with z.open(name) as f:
+                yield from iter_part(f, section)
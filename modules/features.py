@@ -0,0 +1,54 @@
+import datetime as dt, re
+
+# Document features extracted together into one record (cached with the document text).
+# Each requested feature runs its own compiled pattern over the text: the patterns overlap
+# ("01/02/2020.pdf" is both a date and a link), so they can't share one alternation.
+# Record: {"dates": [iso...], "date_strings": n, "links": [...], "versions": [...], "ids": [...]}
+
+PATTERNS = {
+    "dates": r"\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}-\d{2}-\d{2})\b",
+    "versions": r"\bv(?:ersion)?\s*[:\-]?\s*[0-9]+(?:\.[0-9]+)*",
+    "ids": r"\b(?:TDEE\d{5}|TN\d+|RAN\d+)\b",
+    "links": r"https?://\S+|\b\w+\.\w{2,}\b",
+}
+FEATURES = tuple(PATTERNS)
+MAX_ITEMS = 200   # distinct values kept per feature
+
+VERSION_NUM = re.compile(r"[0-9]+(?:\.[0-9]+)*$")
+DATE_PARTS = re.compile(r"(\d{1,2})([/-])(\d{1,2})\2(\d{2}|\d{4})$|(\d{4})-(\d{2})-(\d{2})$")
+RX = {n: re.compile(p, re.I) for n, p in PATTERNS.items()}
+
+def parse_date(s: str) -> dt.date | None:
+    # day-first d/m/y or d-m-y (2- or 4-digit year, same separator twice), or ISO y-m-d
+    m = DATE_PARTS.match(s)
+    if not m: return None
+    if m.group(5): y, mo, d = int(m.group(5)), int(m.group(6)), int(m.group(7))
+    else:
+        d, mo, y = int(m.group(1)), int(m.group(3)), int(m.group(4))
+        if len(m.group(4)) == 2: y += 2000 if y < 69 else 1900
+    try: return dt.date(y, mo, d)
+    except ValueError: return None
+
+def scan(text: str, need) -> dict:
+    names = tuple(n for n in FEATURES if n in need)
+    rec = {n: [] for n in names}
+    if "dates" in rec: rec["date_strings"] = 0
+    if not names or not text: return rec
+    for n in names:
+        found = {}   # insertion-ordered set
+        for m in RX[n].finditer(text):
+            v = m.group()
+            if n == "dates":
+                rec["date_strings"] += 1
+                d = parse_date(v)
+                if d is None: continue
+                v = d.isoformat()
+            elif n == "versions": v = VERSION_NUM.search(v).group()
+            elif n == "ids": v = v.upper()
+            if n == "dates" or len(found) < MAX_ITEMS: found[v] = None
+        rec[n] = sorted(found) if n == "dates" else list(found)
+    return rec
+
+def latest_age_days(rec: dict, today: dt.date | None = None) -> int | None:
+    if not rec.get("dates"): return None
+    return ((today or dt.date.today()) - dt.date.fromisoformat(rec["dates"][-1])).days
@@ -0,0 +1,285 @@
+import json, re, sqlite3, sys, threading, time
+import datetime as dt
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Append-only audit history (replaces one history_<timestamp>.csv per audit).
+# Common payload fields get their own indexed columns; the full payload is kept as JSON.
+# Per-rule findings are stored as integer-coded fact rows (rule and project/client/supplier/vendor
+# go through small dictionary tables), and a weekly rollup of checks/failures per rule and
+# dimension cell is updated in the same transaction as each audit. Failure-rate tables and
+# trends read only the rollup and aggregate it with NumPy, so they don't rescan the history.
+
+FIELDS = {"Project": "project", "Client": "client", "Supplier": "supplier", "Vendor": "vendor",
+          "Site Address": "site_address", "Drawing Title": "drawing_title", "Design File": "design_file",
+          "Status": "status"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, excluded INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{c} TEXT" for c in FIELDS.values())}, payload TEXT, source TEXT);
+CREATE INDEX IF NOT EXISTS history_created ON history(excluded, created_at);
+CREATE INDEX IF NOT EXISTS history_project ON history(project, created_at);
+CREATE INDEX IF NOT EXISTS history_client ON history(client, created_at);
+CREATE INDEX IF NOT EXISTS history_supplier ON history(supplier, created_at);
+CREATE INDEX IF NOT EXISTS history_source ON history(source);
+CREATE TABLE IF NOT EXISTS imports (name TEXT PRIMARY KEY, imported_at REAL);
+CREATE TABLE IF NOT EXISTS rules (id INTEGER PRIMARY KEY, rule_id TEXT UNIQUE NOT NULL, severity TEXT);
+CREATE TABLE IF NOT EXISTS dims (id INTEGER PRIMARY KEY, project TEXT NOT NULL, client TEXT NOT NULL,
+    supplier TEXT NOT NULL, vendor TEXT NOT NULL, UNIQUE (project, client, supplier, vendor));
+CREATE TABLE IF NOT EXISTS findings (history_id INTEGER NOT NULL, rule INTEGER NOT NULL, failed INTEGER NOT NULL,
+    PRIMARY KEY (history_id, rule)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup (week INTEGER NOT NULL, rule INTEGER NOT NULL, dim INTEGER NOT NULL,
+    excluded INTEGER NOT NULL, checks INTEGER NOT NULL, failures INTEGER NOT NULL,
+    PRIMARY KEY (week, rule, dim, excluded)) WITHOUT ROWID;
+"""
+
+DIMS = {"Project": "project", "Client": "client", "Supplier": "supplier", "Vendor": "vendor"}
+ROLLUP_BY = ("Rule", "Week", *DIMS)
+# Monday of the audit's (local) week as days since 1970-01-01, in SQL and in Python
+WEEK_SQL = "CAST(julianday(date(h.created_at, 'unixepoch', 'localtime', 'weekday 0', '-6 days')) - 2440587.5 AS INTEGER)"
+
+def week_of(ts: float) -> int:
+    d = dt.date.fromtimestamp(ts)
+    return (d - dt.date(1970, 1, 1)).days - d.weekday()
+
+class HistoryStore:
+    def __init__(self, path: Path):
+        self.path = Path(path); self._ids = {}; self._cells = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as c:
+            c.execute("PRAGMA journal_mode=WAL"); c.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        c = sqlite3.connect(self.path, timeout=30)
+        try:
+            with c: yield c
+        finally:
+            c.close()
+
+    def _row(self, payload: dict, exclude: bool, created_at: float, source: str):
+        cols = {c: (None if payload.get(k) is None else str(payload.get(k))) for k, c in FIELDS.items()}
+        return {"created_at": created_at, "excluded": int(bool(exclude)), **cols,
+                "payload": json.dumps(payload, default=str), "source": source}
+
+    def append(self, payload: dict, exclude: bool = False, created_at: float | None = None, source: str = "app",
+               findings=None, unique: bool = False) -> int | None:
+        # findings: one {"RuleID", "Status" ("Pass"/"Fail"), "Severity"} record per rule checked;
+        # unique=True: skip (return None) if a row with this source already exists
+        r = self._row(payload, exclude, created_at or time.time(), source)
+        try:
+            with self.connect() as c:
+                if unique:
+                    c.execute("BEGIN IMMEDIATE")   # check and insert as one step
+                    if c.execute("SELECT 1 FROM history WHERE source=? LIMIT 1", (source,)).fetchone(): return None
+                cur = c.execute(f"INSERT INTO history ({','.join(r)}) VALUES ({','.join(':'+k for k in r)})", r)
+                if findings: self._add_findings(c, cur.lastrowid, r, findings)
+                return cur.lastrowid
+        except Exception:
+            self._ids.clear()   # ids interned in a rolled-back transaction
+            raise
+
+    def _intern(self, c, table: str, key: tuple, extra: tuple = ()) -> int:
+        # id from a dictionary table; ids never change, so they are cached per store
+        i = self._ids.get((table, key))
+        if i is None:
+            cols = ("rule_id", "severity") if table == "rules" else tuple(DIMS.values())
+            where = " AND ".join(f"{col}=?" for col in cols[:len(key)])
+            c.execute(f"INSERT OR IGNORE INTO {table} ({','.join(cols)}) VALUES ({','.join('?'*len(cols))})", key + extra)
+            i = self._ids[(table, key)] = c.execute(f"SELECT id FROM {table} WHERE {where}", key).fetchone()[0]
+        return i
+
+    def _add_findings(self, c, history_id: int, row: dict, findings):
+        dim = self._intern(c, "dims", tuple(row[col] or "" for col in DIMS.values()))
+        facts = {}
+        for f in findings:
+            rid = str(f.get("RuleID") or "").strip()
+            if rid: facts[self._intern(c, "rules", (rid,), (f.get("Severity"),))] = int(f.get("Status") == "Fail")
+        week = week_of(row["created_at"])
+        c.executemany("INSERT OR REPLACE INTO findings VALUES (?,?,?)", [(history_id, k, v) for k, v in facts.items()])
+        c.executemany("INSERT INTO rollup VALUES (?,?,?,?,1,?) ON CONFLICT (week, rule, dim, excluded) "
+                      "DO UPDATE SET checks=checks+1, failures=failures+?",
+                      [(week, k, dim, row["excluded"], v, v) for k, v in facts.items()])
+
+    def rebuild_rollup(self) -> int:
+        # recompute the rollup from the findings (e.g. after editing history rows by hand)
+        with self.connect() as c:
+            # user_version counts rebuilds, so cached rollups in other processes are refreshed too
+            c.execute(f"PRAGMA user_version={c.execute('PRAGMA user_version').fetchone()[0] + 1}")
+            c.execute("DELETE FROM rollup")
+            c.execute(f"""INSERT INTO rollup SELECT {WEEK_SQL}, f.rule, d.id, h.excluded, COUNT(*), SUM(f.failed)
+                FROM findings f JOIN history h ON h.id=f.history_id
+                JOIN dims d ON d.project=COALESCE(h.project,'') AND d.client=COALESCE(h.client,'')
+                    AND d.supplier=COALESCE(h.supplier,'') AND d.vendor=COALESCE(h.vendor,'')
+                GROUP BY 1, 2, 3, 4""")
+            return c.execute("SELECT COUNT(*) FROM rollup").fetchone()[0]
+
+    def findings(self, history_id: int) -> pd.DataFrame:
+        sql = ('SELECT r.rule_id AS "RuleID", r.severity AS "Severity", CASE f.failed WHEN 1 THEN \'Fail\' ELSE \'Pass\' END AS "Status" '
+               "FROM findings f JOIN rules r ON r.id=f.rule WHERE f.history_id=? ORDER BY r.rule_id")
+        with self.connect() as c:
+            return pd.read_sql_query(sql, c, params=[history_id])
+
+    def _rollup(self, filters: dict | None, include_excluded: bool, weeks: int | None):
+        # rollup cells as int64 columns (week, rule, dim, checks, failures) plus the dictionary tables;
+        # the whole rollup is held in memory until an audit is appended or the rollup is rebuilt
+        with self.connect() as c:
+            stamp = (c.execute("SELECT MAX(id) FROM history").fetchone()[0], c.execute("PRAGMA user_version").fetchone()[0])
+            if self._cells is None or self._cells[0] != stamp:
+                rules = pd.read_sql_query("SELECT id, rule_id, severity FROM rules", c)
+                dims = pd.read_sql_query("SELECT id, project, client, supplier, vendor FROM dims", c)
+                rows = c.execute("SELECT week, rule, dim, checks, failures, excluded FROM rollup").fetchall()
+                self._cells = (stamp, np.array(rows, dtype=np.int64).reshape(-1, 6), rules, dims)
+        _, a, rules, dims = self._cells
+        m = np.ones(len(a), dtype=bool)
+        if not include_excluded: m &= a[:, 5] == 0
+        if weeks: m &= a[:, 0] >= week_of(time.time()) - 7*(weeks - 1)
+        a = a[m, :5]
+        keep = np.ones(len(dims), dtype=bool)
+        for k, v in (filters or {}).items():
+            if v in (None, "", []) or k not in DIMS: continue
+            keep &= dims[DIMS[k]].isin(v if isinstance(v, (list, tuple)) else [v]).to_numpy()
+        if not keep.all(): a = a[np.isin(a[:, 2], dims["id"].to_numpy()[keep])]
+        return a, rules, dims
+
+    @staticmethod
+    def _codes(by: str, a, rules, dims):
+        # per-cell group code and the label for each code
+        if by == "Week":
+            labels, codes = np.unique(a[:, 0], return_inverse=True)
+            return codes, pd.to_datetime(labels, unit="D")
+        if by == "Rule": ids, names = rules["id"].to_numpy(), rules["rule_id"].to_numpy()
+        elif by in DIMS:
+            ids = dims["id"].to_numpy()
+            cat, names = pd.factorize(dims[DIMS[by]].replace("", "(none)"))
+            names = np.asarray(names)
+        else: raise ValueError(f"Cannot aggregate findings by {by!r}")
+        ids = ids.astype(np.int64)   # an empty table reads back as float
+        lookup = np.zeros(int(ids.max(initial=0)) + 1, dtype=np.int64)
+        lookup[ids] = np.arange(len(ids)) if by == "Rule" else cat
+        return lookup[a[:, 1 if by == "Rule" else 2]], names
+
+    def failure_rates(self, by: str = "Rule", filters: dict | None = None, include_excluded: bool = False,
+                      weeks: int | None = None) -> pd.DataFrame:
+        a, rules, dims = self._rollup(filters, include_excluded, weeks)
+        codes, labels = self._codes(by, a, rules, dims)
+        checks = np.bincount(codes, weights=a[:, 3], minlength=len(labels))
+        fails = np.bincount(codes, weights=a[:, 4], minlength=len(labels))
+        df = pd.DataFrame({by: labels, "Checks": checks.astype(np.int64), "Failures": fails.astype(np.int64)})
+        df = df[df["Checks"] > 0]
+        df["Failure rate"] = (df["Failures"] / df["Checks"]).round(4)
+        if by == "Rule": df.insert(1, "Severity", rules.set_index("rule_id").loc[df["Rule"], "severity"].to_numpy())
+        return df.sort_values(by if by == "Week" else ["Failure rate", "Checks"], ascending=by == "Week", ignore_index=True)
+
+    def failure_trend(self, by: str | None = None, top: int = 5, filters: dict | None = None,
+                      include_excluded: bool = False, weeks: int | None = 52) -> pd.DataFrame:
+        # weekly failure rate: one column overall, or one per top-`top` most-failing values of `by`
+        a, rules, dims = self._rollup(filters, include_excluded, weeks)
+        wk, weeks_idx = self._codes("Week", a, rules, dims)
+        if by is None:
+            codes, labels = np.zeros(len(a), dtype=np.int64), np.array(["All rules"])
+        else:
+            codes, labels = self._codes(by, a, rules, dims)
+            checks = np.bincount(codes, weights=a[:, 3], minlength=len(labels))
+            fails = np.bincount(codes, weights=a[:, 4], minlength=len(labels))
+            pick = np.lexsort((-checks, -fails))[:top]; pick = pick[checks[pick] > 0]
+            remap = np.full(len(labels), -1); remap[pick] = np.arange(len(pick))
+            codes = remap[codes]; m = codes >= 0
+            a, wk, codes, labels = a[m], wk[m], codes[m], labels[pick]
+        n = len(weeks_idx) * len(labels)
+        flat = wk * len(labels) + codes
+        checks = np.bincount(flat, weights=a[:, 3], minlength=n).reshape(len(weeks_idx), len(labels))
+        fails = np.bincount(flat, weights=a[:, 4], minlength=n).reshape(len(weeks_idx), len(labels))
+        with np.errstate(invalid="ignore", divide="ignore"): rate = np.where(checks > 0, fails / checks, np.nan)
+        return pd.DataFrame(rate, index=pd.Index(weeks_idx, name="Week"), columns=list(labels))
+
+    def _where(self, filters: dict | None, include_excluded: bool, since: float | None = None):
+        where, args = ([] if include_excluded else ["excluded=0"]), []
+        for k, v in (filters or {}).items():
+            if v in (None, "", []): continue
+            col = FIELDS.get(k, k)
+            if col not in FIELDS.values(): continue
+            if isinstance(v, (list, tuple)):
+                where.append(f"{col} IN ({','.join('?'*len(v))})"); args.extend(v)
+            else:
+                where.append(f"{col}=?"); args.append(v)
+        if since is not None: where.append("created_at>=?"); args.append(since)
+        return (" WHERE " + " AND ".join(where)) if where else "", args
+
+    def count(self, filters: dict | None = None, include_excluded: bool = False) -> int:
+        w, args = self._where(filters, include_excluded)
+        with self.connect() as c:
+            return c.execute("SELECT COUNT(*) FROM history" + w, args).fetchone()[0]
+
+    def page(self, limit: int = 200, offset: int = 0, filters: dict | None = None, include_excluded: bool = False) -> pd.DataFrame:
+        # newest first
+        w, args = self._where(filters, include_excluded)
+        sel = ", ".join(f'{c} AS "{k}"' for k, c in FIELDS.items())
+        sql = f"SELECT id, datetime(created_at, 'unixepoch', 'localtime') AS \"When\", {sel}, excluded AS \"Excluded\" FROM history{w} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        with self.connect() as c:
+            df = pd.read_sql_query(sql, c, params=args + [limit, offset])
+        df["Excluded"] = df["Excluded"].astype(bool)
+        return df
+
+    def aggregate(self, by: str = "Supplier", filters: dict | None = None, include_excluded: bool = False,
+                  since: float | None = None) -> pd.DataFrame:
+        col = FIELDS.get(by, by)
+        if col not in FIELDS.values(): raise ValueError(f"Cannot aggregate by {by!r}")
+        w, args = self._where(filters, include_excluded, since)
+        sql = f'SELECT COALESCE({col}, \'(none)\') AS "{by}", COUNT(*) AS audits, MAX(created_at) AS last_at FROM history{w} GROUP BY 1 ORDER BY audits DESC'
+        with self.connect() as c:
+            df = pd.read_sql_query(sql, c, params=args)
+        df["last_at"] = pd.to_datetime(df["last_at"], unit="s")
+        return df
+
+    def per_day(self, filters: dict | None = None, include_excluded: bool = False, days: int = 90) -> pd.DataFrame:
+        w, args = self._where(filters, include_excluded, time.time() - days*86400)
+        sql = f"SELECT date(created_at, 'unixepoch', 'localtime') AS day, COUNT(*) AS audits FROM history{w} GROUP BY 1 ORDER BY 1"
+        with self.connect() as c:
+            return pd.read_sql_query(sql, c, params=args)
+
+    def distinct(self, field: str) -> list[str]:
+        col = FIELDS[field]
+        with self.connect() as c:
+            return [r[0] for r in c.execute(f"SELECT DISTINCT {col} FROM history WHERE {col} IS NOT NULL ORDER BY 1")]
+
+    def import_csv_dir(self, history_dir: Path) -> int:
+        # one-shot importer for legacy history_<YYYYmmdd_HHMMSS>[_excluded].csv files; each file imports once
+        n = 0
+        for p in sorted(Path(history_dir).glob("history_*.csv")):
+            with self.connect() as c:
+                if c.execute("SELECT 1 FROM imports WHERE name=?", (p.name,)).fetchone(): continue
+                try:
+                    df = pd.read_csv(p, dtype=str, keep_default_na=False)
+                except Exception:
+                    continue
+                m = re.match(r"history_(\d{8}_\d{6})", p.name)
+                ts = dt.datetime.strptime(m.group(1), "%Y%m%d_%H%M%S").timestamp() if m else p.stat().st_mtime
+                rows = [self._row(rec, p.stem.endswith("_excluded"), ts, p.name) for rec in df.to_dict("records")]
+                if rows:
+                    c.executemany(f"INSERT INTO history ({','.join(rows[0])}) VALUES ({','.join(':'+k for k in rows[0])})", rows)
+                c.execute("INSERT INTO imports VALUES (?,?)", (p.name, time.time()))
+                n += len(rows)
+        return n
+
+_OPEN: dict = {}
+_LOCK = threading.Lock()
+
+def open_history(path: Path = Path("history/history.sqlite")) -> HistoryStore:
+    # a newly created store imports any legacy CSVs sitting next to it
+    path = Path(path); k = str(path.resolve())
+    with _LOCK:
+        store = _OPEN.get(k)
+        if store is None or not path.exists():
+            is_new = not path.exists()
+            store = _OPEN[k] = HistoryStore(path)
+            if is_new: store.import_csv_dir(path.parent)
+    return store
+
+if __name__ == "__main__":
+    # python -m modules.history_store [history_dir]
+    d = Path(sys.argv[1] if len(sys.argv) > 1 else "history")
+    print(f"Imported {open_history(d / 'history.sqlite').import_csv_dir(d)} row(s) from {d}")
@@ -1,12 +1,127 @@
 from pathlib import Path
-import re, zipfile, hashlib, time
-import pandas as pd
+from typing import NamedTuple
+import io, json, os, re, shutil, threading, zipfile, hashlib, time
+from concurrent.futures import ProcessPoolExecutor
+from .text_cache import TEXT_CACHE
+from .catalog import open_catalog
+from .docx_stream import iter_docx
+from . import ocr
+from .metrics import METRICS
+from .pools import init_worker, mp_context, worker_settings
+from .features import scan as scan_features
 
-def ensure_guidance_from_zip(zip_path: Path, dest_dir: Path):
+PDF_KIND = "pdf:1"
+DOCX_KIND = "docx:2"
+FEATURES_KIND = "feat:2"
+
+ZIP_MANIFEST = ".guidance_zip.json"
+
+class ZipMember(NamedTuple):
+    # a document read straight from a ZIP archive, usable wherever a Path source is accepted
+    zip_path: str
+    name: str
+
+    @property
+    def suffix(self) -> str: return Path(self.name).suffix
+
+    def read_bytes(self) -> bytes:
+        with zipfile.ZipFile(self.zip_path) as z: return z.read(self.name)
+
+class MemorySource(NamedTuple):
+    # an in-memory document (upload buffer); data is bytes, bytearray or a memoryview and is never copied
+    name: str
+    data: object
+
+    @property
+    def suffix(self) -> str: return Path(self.name).suffix
+
+    def read_bytes(self): return self.data
+
+BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+def pdf_buffer(data):
+    # fitz only takes bytes/bytearray streams; unwrap whole-buffer memoryviews instead of copying
+    if isinstance(data, memoryview):
+        obj = data.obj
+        return obj if isinstance(obj, (bytes, bytearray)) and data.contiguous and data.nbytes == len(obj) else data.tobytes()
+    return data
+
+def _safe_member(name: str) -> bool:
+    p = Path(name)
+    return not p.is_absolute() and ".." not in p.parts
+
+def zip_fingerprint(zip_path: Path) -> dict:
+    st = zip_path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _writer_tag() -> str:
+    # temp-file suffix unique to this process and thread: concurrent sessions (or jobs)
+    # extracting the same archive never write into each other's temp files
+    return f"{os.getpid()}.{threading.get_ident()}"
+
+def ensure_guidance_from_zip(zip_path: Path, dest_dir: Path, extract: bool = True) -> dict:
+    # Only new/changed members (by CRC and size) are written; an archive whose size and mtime
+    # match the manifest isn't even opened. extract=False just records the manifest so the
+    # indexer/extractor can read members from the archive (see ZipMember, index_folder).
     dest_dir.mkdir(parents=True, exist_ok=True)
-    if zip_path and zip_path.exists() and zip_path.suffix.lower()==".zip":
-        with zipfile.ZipFile(zip_path, "r") as z:
-            z.extractall(dest_dir)
+    stats = {"extracted": 0, "unchanged": 0, "skipped": False}
+    if not (zip_path and zip_path.exists() and zip_path.suffix.lower()==".zip"): return stats
+    mf = dest_dir / ZIP_MANIFEST
+    try:
+        manifest = json.loads(mf.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    fp = zip_fingerprint(zip_path)
+    if manifest.get("zip") == fp and manifest.get("extracted", True) == extract:
+        stats["skipped"] = True; return stats
+    old = manifest.get("members", {}) if manifest.get("extracted", True) else {}
+    members = {}
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for info in z.infolist():
+            if info.is_dir() or not _safe_member(info.filename): continue
+            members[info.filename] = {"crc": info.CRC, "size": info.file_size}
+            if not extract: continue
+            target = dest_dir / info.filename
+            prev = old.get(info.filename)
+            if prev == members[info.filename] and target.exists() and target.stat().st_size == info.file_size:
+                stats["unchanged"] += 1; continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f"{target.name}.{_writer_tag()}.part")
+            try:
+                with z.open(info) as fi, open(tmp, "wb") as fo: shutil.copyfileobj(fi, fo, 1024*1024)
+                os.replace(tmp, target)
+            finally:
+                tmp.unlink(missing_ok=True)
+            stats["extracted"] += 1
+    tmp = mf.with_name(f"{mf.name}.{_writer_tag()}.tmp")
+    try:
+        tmp.write_text(json.dumps({"zip": fp, "extracted": extract, "members": members}), encoding="utf-8")
+        os.replace(tmp, mf)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return stats
+
+def as_source(src, name: str | None = None):
+    # path, ZipMember, MemorySource, or a raw buffer (type sniffed from its magic bytes unless named)
+    if isinstance(src, (ZipMember, MemorySource)): return src
+    if isinstance(src, BUFFER_TYPES):
+        if name is None: name = "memory.pdf" if bytes(src[:5]) == b"%PDF-" else "memory.docx"
+        return MemorySource(name, src)
+    return Path(src)
+
+def open_pdf(src):
+    # fitz document from a path, ZIP member or buffer; buffers are opened as streams, not spilled to disk
+    import fitz
+    src = as_source(src)
+    if isinstance(src, Path): return fitz.open(src)
+    return fitz.open(stream=pdf_buffer(src.read_bytes()), filetype="pdf")
+
+def guidance_source(root: Path, rel: str):
+    # library file on disk, or the member inside root/Guidance.zip when the library is read lazily
+    p = Path(root) / rel
+    if p.exists(): return p
+    z = Path(root) / "Guidance.zip"
+    return ZipMember(str(z), rel) if z.exists() else p
 
 def sha256_file(path: Path) -> str:
     h = hashlib.sha256()
@@ -15,24 +130,120 @@ def sha256_file(path: Path) -> str:
             h.update(chunk)
     return h.hexdigest()
 
-def docx_text(path: Path) -> str:
+_DIGESTS: dict = {}
+
+def file_digest(path) -> str:
+    # sha256 memoised on (path, size, mtime) so cache lookups don't re-hash unchanged files
+    if isinstance(path, MemorySource): return hashlib.sha256(path.data).hexdigest()
+    if isinstance(path, ZipMember):
+        st = os.stat(path.zip_path); key = (path.zip_path, st.st_size, st.st_mtime_ns, path.name)
+    else:
+        st = path.stat(); key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    sha = _DIGESTS.get(key)
+    if sha is None:
+        if len(_DIGESTS) > 4096: _DIGESTS.clear()
+        sha = hashlib.sha256(path.read_bytes()).hexdigest() if isinstance(path, ZipMember) else sha256_file(path)
+        _DIGESTS[key] = sha
+    return sha
+
+def cached_pages(path, kind: str, extract) -> list[str]:
     try:
-        with zipfile.ZipFile(path) as z:
-            xml = z.read('word/document.xml').decode('utf-8', errors='ignore')
-        return re.sub(r'<[^>]+>', '', xml)
+        sha = file_digest(path)
+        pages = TEXT_CACHE.get(sha, kind)
+        if pages is not None:
+            METRICS.count("text_cache.hit"); return pages
     except Exception:
-        return ""
+        sha = None
+    METRICS.count("text_cache.miss")
+    pages = extract(path)
+    if sha and pages is not None:
+        try: TEXT_CACHE.put(sha, kind, pages)
+        except Exception: pass
+    return pages or []
 
-def pdf_text(path: Path) -> str:
+def _docx_pages(path):
+    # one cache "page" per segment, stored as "<section>\x1f<text>"
+    try:
+        with METRICS.span("extract.docx") as s:
+            data = None if isinstance(path, Path) else path.read_bytes()
+            out = [f"{section}\x1f{text}" for section, text in iter_docx(path if data is None else io.BytesIO(data))]
+            s.bytes = os.path.getsize(path) if data is None else len(data)
+        return out
+    except Exception:
+        return None
+
+def _pdf_pages(path):
     try:
         import fitz
-        doc = fitz.open(path)
-        out = []
-        for p in doc: out.append(p.get_text('text'))
-        doc.close()
-        return "\n".join(out)
+        with METRICS.span("extract.pdf") as s:
+            data = None if isinstance(path, Path) else pdf_buffer(path.read_bytes())
+            doc = fitz.open(path) if data is None else fitz.open(stream=data, filetype="pdf")
+            out = []
+            for p in doc: out.append(p.get_text('text'))
+            doc.close()
+            s.pages = len(out); s.bytes = len(data) if data is not None else os.path.getsize(path)
+    except Exception:
+        return None
+    # scanned pages have no text layer: OCR them (in parallel, cached per page)
+    blank = [i for i, t in enumerate(out) if not t.strip()]
+    for i, words in ocr.ocr_pages(data if data is not None else path, blank).items():
+        out[i] = ocr.words_text(words)
+    return out
+
+def docx_segments(path) -> list[tuple[str, str]]:
+    return [tuple(p.split("\x1f", 1)) for p in cached_pages(as_source(path), DOCX_KIND, _docx_pages)]
+
+def docx_text(path) -> str:
+    return "\n".join(t for _, t in docx_segments(path))
+
+def _pdf_kind() -> str:
+    # OCR'd and text-layer-only extractions are cached separately
+    return PDF_KIND + (":ocr" if ocr.enabled() else "")
+
+def pdf_pages(path) -> list[str]:
+    return cached_pages(as_source(path), _pdf_kind(), _pdf_pages)
+
+def pdf_text(path) -> str:
+    return "\n".join(pdf_pages(path))
+
+def extract_segments(path) -> list[tuple[str, str]]:
+    # (section, text) pieces: DOCX paragraphs/cells/headers/footers, or one "body" segment per PDF page
+    path = as_source(path)
+    if path.suffix.lower()==".docx": return docx_segments(path)
+    if path.suffix.lower()==".pdf": return [("body", t) for t in pdf_pages(path)]
+    return []
+
+def section_texts(segments) -> dict:
+    out = {}
+    for section, text in segments: out.setdefault(section, []).append(text)
+    return {k: "\n".join(v) for k, v in out.items()}
+
+def extract_text(path) -> str:
+    path = as_source(path)
+    if path.suffix.lower()==".docx": return docx_text(path)
+    if path.suffix.lower()==".pdf": return pdf_text(path)
+    return ""
+
+def document_features(path, need) -> dict:
+    # dates/links/versions/ids of the whole text; computed once per feature set and cached
+    # next to the text, keyed by the text extractor kind so re-extraction also refreshes them
+    path = as_source(path); need = set(need)
+    ext = path.suffix.lower()
+    kind = f"{FEATURES_KIND}|{DOCX_KIND if ext=='.docx' else _pdf_kind()}"
+    try:
+        sha = file_digest(path); hit = TEXT_CACHE.get(sha, kind)
     except Exception:
-        return ""
+        sha = hit = None
+    rec = json.loads(hit[0]) if hit else {}
+    missing = need - rec.keys()
+    if missing:
+        with METRICS.span("features.scan") as s:
+            text = extract_text(path); s.bytes = len(text)
+            rec.update(scan_features(text, missing))
+        if sha:
+            try: TEXT_CACHE.put(sha, kind, [json.dumps(rec)])
+            except Exception: pass
+    return rec
 
 def series_from_name(name: str) -> str:
     if re.search(r'\bTDEE4\d{3,}\b', name): return "TDEE 4000"
@@ -53,37 +264,94 @@ def extract_key(name: str) -> str:
     m = re.search(r'\b(TDEE\d{5}|TN\d+|RAN\d+)\b', name, re.I)
     return m.group(1).upper() if m else Path(name).stem.upper()
 
-def index_folder(root: Path, out_csv: Path, mode: str="append", supersede: bool=True) -> Path:
-    rows = []
+INDEX_EXTS = {'.pdf','.docx'}
+
+def list_sources(root: Path) -> list[tuple[str, int, int]]:
+    # (relative name, size, mtime_ns) for every indexable file under a folder or inside a .zip
+    root = Path(root)
+    if root.is_file() and root.suffix.lower()==".zip":
+        with zipfile.ZipFile(root) as z:
+            return [(i.filename, i.file_size, int(time.mktime(i.date_time + (0, 0, -1)))*10**9)
+                    for i in z.infolist()
+                    if not i.is_dir() and _safe_member(i.filename) and Path(i.filename).suffix.lower() in INDEX_EXTS]
+    out = []
     for p in root.rglob('*'):
-        if not p.is_file() or p.suffix.lower() not in {'.pdf','.docx'}: continue
-        ext = p.suffix.lower()
-        text = (docx_text(p) if ext=='.docx' else pdf_text(p))[:20000]
-        rows.append({
-            "file": str(p.relative_to(root)),
-            "key": extract_key(p.name),
-            "series": series_from_name(p.name),
-            "version": extract_version(p.name + " " + text),
-            "sha256": sha256_file(p),
-            "size_bytes": p.stat().st_size,
-            "title_guess": p.stem[:200],
-            "active": True,
-            "indexed_at": int(time.time())
-        })
-    df_new = pd.DataFrame(rows)
-    out_csv.parent.mkdir(parents=True, exist_ok=True)
-    if mode=="overwrite" or not out_csv.exists():
-        df = df_new
-    else:
-        df_old = pd.read_csv(out_csv) if out_csv.exists() else pd.DataFrame(columns=df_new.columns)
-        df = pd.concat([df_old, df_new], ignore_index=True).drop_duplicates(subset=["file","sha256"], keep="last")
-    if supersede and not df.empty:
-        def vt(v): 
-            try: return tuple(int(x) for x in (v or "0").split("."))
-            except: return (0,)
-        df["__v"] = df["version"].fillna("").apply(vt)
-        df = df.sort_values(["key","__v"])
-        df["active"] = df.groupby("key")["__v"].transform(lambda s: s==s.max())
-        df = df.drop(columns="__v")
-    df.to_csv(out_csv, index=False)
-    return out_csv
+        if not p.is_file() or p.suffix.lower() not in INDEX_EXTS: continue
+        st = p.stat(); out.append((str(p.relative_to(root)), st.st_size, st.st_mtime_ns))
+    return out
+
+def _source(root: str, rel: str):
+    return ZipMember(str(root), rel) if str(root).lower().endswith(".zip") else Path(root) / rel
+
+def _index_one(args) -> dict:
+    # worker: a file that cannot be read comes back as {"file", "error"} instead of ending the run
+    try:
+        return _index_row(*args)
+    except Exception as e:
+        return {"file": args[1], "error": f"{type(e).__name__}: {e}"}
+
+def _index_row(root, rel, size, mtime_ns, old_sha) -> dict:
+    # hash first, extract only if the content differs from the indexed copy
+    src = _source(root, rel); name = Path(rel).name
+    row = {"file": rel, "sha256": file_digest(src), "size_bytes": size, "mtime_ns": mtime_ns,
+           "indexed_at": int(time.time())}
+    if row["sha256"] == old_sha: return row
+    row.update({
+        "key": extract_key(name),
+        "series": series_from_name(name),
+        "version": extract_version(name) or next(iter(document_features(src, {"versions"})["versions"]), ""),
+        "title_guess": Path(name).stem[:200],
+        "active": True,
+    })
+    return row
+
+def _imap(fn, items, workers: int | None):
+    # results in order, as they arrive
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) <= 1:
+        yield from map(fn, items); return
+    with ProcessPoolExecutor(max_workers=min(workers, len(items)), mp_context=mp_context(),
+                             initializer=init_worker, initargs=(worker_settings(),)) as ex:
+        yield from ex.map(fn, items, chunksize=max(1, len(items)//(workers*4)))
+
+INDEX_BATCH = 100   # changed docs (and their text) per catalog transaction
+
+def index_folder(root: Path, index_path: Path, mode: str="append", supersede: bool=True,
+                 incremental: bool=True, workers: int | None=None, errors: list | None=None) -> Path:
+    # root is a guidance folder, or a .zip whose members are indexed without extracting.
+    # Files that fail to read are skipped and reported as {"file", "error"} rows in `errors`.
+    cat = open_catalog(index_path, root)
+    if mode=="overwrite": cat.clear()
+    latest = cat.latest_by_file() if mode!="overwrite" else {}
+    todo = []
+    for rel, size, mtime_ns in list_sources(root):
+        old = latest.get(rel)
+        if incremental and old and old["size_bytes"] == size and old["mtime_ns"] == mtime_ns:
+            continue
+        todo.append((str(root), rel, size, mtime_ns, old["sha256"] if (incremental and old) else None))
+    errors = [] if errors is None else errors
+    unchanged, keys, rows, texts = [], set(), [], {}
+    def flush():
+        nonlocal keys
+        if rows: keys |= cat.upsert(rows, texts); rows.clear(); texts.clear()
+    # changed docs go into the catalog in batches as results arrive; whatever has been
+    # upserted is superseded even if the run stops partway
+    try:
+        with METRICS.span("index.extract") as s:
+            for r in _imap(_index_one, todo, workers):
+                if "error" in r: errors.append(r); continue
+                if "key" not in r: unchanged.append(r); continue
+                try:
+                    texts[r["file"]] = extract_text(_source(root, r["file"]))
+                except Exception as e:
+                    errors.append({"file": r["file"], "error": f"{type(e).__name__}: {e}"}); continue
+                rows.append(r)
+                if len(rows) >= INDEX_BATCH: flush()
+            flush()
+            s.bytes = sum(t[2] for t in todo)
+    finally:
+        cat.touch(unchanged)
+        if supersede and keys:
+            cat.supersede(None if mode=="overwrite" else keys)
+        if errors: METRICS.count("index.extract.skipped", len(errors))
+    return index_path
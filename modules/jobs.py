@@ -0,0 +1,198 @@
+import hashlib, json, os, pickle, sqlite3, threading, time, traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from .metrics import METRICS
+from .pools import mp_context
+
+# Local audit job queue shared by every Streamlit session in the process.
+# Jobs live in a SQLite table (queued/running/done/failed + progress) and run in a
+# process pool; the job id is a hash of kind, input content, ruleset version and
+# params, so submitting the same audit twice returns the existing job.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, progress REAL DEFAULT 0, message TEXT,
+    input TEXT, owner INTEGER, created_at REAL, started_at REAL, finished_at REAL, result TEXT, error TEXT);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+"""
+
+@contextmanager
+def _db(path):
+    c = sqlite3.connect(path, timeout=30)
+    try:
+        with c: yield c
+    finally:
+        c.close()
+
+def _update(db, job_id, **cols):
+    with _db(db) as c:
+        c.execute(f"UPDATE jobs SET {', '.join(f'{k}=?' for k in cols)} WHERE id=?", (*cols.values(), job_id))
+
+# ---- job kinds (run inside worker processes) ----
+
+def _doc_audit(args, progress):
+    import io
+    import pandas as pd
+    from .doc_rules import run_doc_checks
+    from .ingest import as_source
+    from .report_store import REPORTS
+    progress(0.1, "Extracting text")
+    df = run_doc_checks(as_source(args["input"]), args["rules"])
+    progress(0.8, "Writing Excel")
+    buf = io.BytesIO()
+    with METRICS.span("export.xlsx") as s:
+        with pd.ExcelWriter(buf, engine="openpyxl") as w: df.to_excel(w, index=False, sheet_name="Findings")
+        s.bytes = buf.getbuffer().nbytes
+    art = REPORTS.put(buf.getvalue(), args["name"], "findings", key=args["job_id"], input_sha=args.get("input_sha"))
+    return {"findings": df, "xlsx": str(art.path), "xlsx_name": art.name}
+
+def _design_audit(args, progress):
+    from .design_audit import audit_design
+    from .pdf_annotate import annotate_marks
+    from .report_store import REPORTS
+    progress(0.1, "Scanning pages")
+    audit = audit_design(Path(args["input"]), args["rules"], workers=args.get("workers"))   # pages scanned in parallel
+    if args.get("annotate") and audit["marks"]:
+        art = REPORTS.find(key=args["job_id"], kind="annotated")
+        if art is None:
+            progress(0.8, "Annotating")
+            tmp = annotate_marks(Path(args["input"]), REPORTS.tmp_path(".pdf"), audit["marks"])
+            art = REPORTS.put_file(tmp, args["name"], "annotated", key=args["job_id"], input_sha=args.get("input_sha"), move=True)
+        audit["annotated"] = str(art.path); audit["annotated_name"] = art.name
+    if args.get("history"):
+        from .utils import save_history_row
+        h = args["history"]
+        save_history_row(h["payload"], exclude=h.get("exclude", False), findings=audit["results"].to_dict("records"),
+                         source=f"submit:{h['submission']}")
+    return audit
+
+def _mine(args, progress):
+    from .rule_mining import mine_rules_from_file
+    from .ingest import as_source
+    progress(0.1, "Mining")
+    return {"mined": mine_rules_from_file(as_source(args["input"]), max_items=args.get("max_items", 120))}
+
+KINDS = {"doc_audit": _doc_audit, "design_audit": _design_audit, "mine": _mine}
+
+def _run(db: str, results_dir: str, job_id: str, kind: str, args: dict):
+    _update(db, job_id, status="running", started_at=time.time(), owner=os.getpid(), message="Started")
+    progress = lambda frac, msg="": _update(db, job_id, progress=float(frac), message=msg)
+    try:
+        from .auth import get_settings
+        from .ocr import OCR
+        settings = get_settings()   # spawned workers don't inherit the app's settings
+        OCR.update(settings.get("ocr", {}))
+        from .text_cache import TEXT_CACHE
+        TEXT_CACHE.max_bytes = int(settings.get("cache", {}).get("text_max_mb", 512))*1024*1024
+        from .report_store import configure as configure_reports
+        configure_reports(settings.get("reports", {}))
+        args = {**args, "job_id": job_id}
+        METRICS.enabled = bool(settings.get("metrics", {}).get("enabled", True))
+        with METRICS.span(f"job.{kind}"): result = KINDS[kind](args, progress)
+        out = Path(results_dir) / f"{job_id}.pkl"
+        tmp = out.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f: pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, out)
+        _update(db, job_id, status="done", progress=1.0, message="Done", finished_at=time.time(), result=str(out))
+    except Exception as e:
+        _update(db, job_id, status="failed", message=str(e), error=traceback.format_exc(), finished_at=time.time())
+    finally:
+        METRICS.flush()
+
+class JobQueue:
+    def __init__(self, root: Path = Path("cache/jobs"), workers: int | None = None):
+        self.root = Path(root); self.root.mkdir(parents=True, exist_ok=True)
+        self.db = str(self.root / "jobs.sqlite")
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._pool = None; self._lock = threading.Lock()
+        with _db(self.db) as c:
+            c.execute("PRAGMA journal_mode=WAL"); c.executescript(SCHEMA)
+        self._reap()
+
+    def _reap(self):
+        # jobs left queued/running by a process that no longer exists can never finish
+        with _db(self.db) as c:
+            for job_id, owner in c.execute("SELECT id, owner FROM jobs WHERE status IN ('queued','running')").fetchall():
+                if owner and not _alive(owner):
+                    c.execute("UPDATE jobs SET status='failed', message='Interrupted' WHERE id=?", (job_id,))
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context())
+            return self._pool
+
+    @staticmethod
+    def job_id(kind: str, input_sha: str, rules_version: str = "", params: dict | None = None) -> str:
+        blob = json.dumps([kind, input_sha, rules_version, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+
+    def submit(self, kind: str, input_sha: str, args: dict, rules_version: str = "", params: dict | None = None,
+               retry: bool = False) -> str:
+        # a failed job keeps its error until it is re-submitted with retry=True (an explicit user action)
+        job_id = self.job_id(kind, input_sha, rules_version, params)
+        with _db(self.db) as c:
+            c.execute("BEGIN IMMEDIATE")   # check-and-enqueue as one step, so concurrent submits run the job once
+            row = c.execute("SELECT status FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row and row[0] in ("queued", "running") or (row and row[0] == "done" and self._has_result(job_id)):
+                return job_id
+            if row and row[0] == "failed" and not retry:
+                return job_id
+            c.execute("INSERT OR REPLACE INTO jobs (id, kind, status, progress, message, input, owner, created_at) "
+                      "VALUES (?,?,?,?,?,?,?,?)", (job_id, kind, "queued", 0.0, "Queued", str(args.get("input")), os.getpid(), time.time()))
+        try:
+            fut = self._executor().submit(_run, self.db, str(self.root), job_id, kind, args)
+        except Exception as e:
+            _update(self.db, job_id, status="failed", message=f"Worker error: {e}", finished_at=time.time())
+            raise
+        fut.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _on_done(self, job_id: str, fut):
+        # _run records its own outcome; this only catches workers that died or never started
+        exc = None if fut.cancelled() else fut.exception()
+        if fut.cancelled() or exc is not None:
+            _update(self.db, job_id, status="failed", message=f"Worker error: {exc or 'cancelled'}", finished_at=time.time())
+        if isinstance(exc, BrokenProcessPool):
+            with self._lock: self._pool = None
+
+    def _has_result(self, job_id: str) -> bool:
+        # a finished job is reused only while its report artifacts are still stored
+        from .report_store import REPORTS
+        return (self.root / f"{job_id}.pkl").exists() and not REPORTS.expired(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with _db(self.db) as c:
+            c.row_factory = sqlite3.Row
+            row = c.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def result(self, job_id: str):
+        job = self.get(job_id)
+        if not job or job["status"] != "done": return None
+        with open(job["result"], "rb") as f: return pickle.load(f)
+
+    def recent(self, limit: int = 50):
+        import pandas as pd
+        with _db(self.db) as c:
+            return pd.read_sql_query("SELECT id, kind, status, progress, message, input, created_at, finished_at "
+                                     "FROM jobs ORDER BY created_at DESC LIMIT ?", c, params=[limit])
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0); return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+_QUEUE = None
+_QLOCK = threading.Lock()
+
+def get_queue(root: Path = Path("cache/jobs"), workers: int | None = None) -> JobQueue:
+    global _QUEUE
+    with _QLOCK:
+        if _QUEUE is None: _QUEUE = JobQueue(root, workers)
+    return _QUEUE
@@ -0,0 +1,199 @@
+import atexit, json, os, sqlite3, sys, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from multiprocessing import util as mp_util
+from pathlib import Path
+
+# Per-stage timing spans and counters. Each process aggregates in memory (count, total
+# and max seconds, latency histogram, bytes, pages) and merges into one SQLite table
+# every few seconds, so worker processes and the app all report into the same place.
+# When disabled, span() hands back a shared no-op object and count() returns at once.
+#
+#   with METRICS.span("extract.pdf") as s: ...; s.pages = n; s.bytes = size
+#   METRICS.count("text_cache.hit")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (name TEXT, kind TEXT, count INTEGER, total REAL, max REAL, bytes INTEGER,
+                                    pages INTEGER, buckets TEXT, updated_at REAL, PRIMARY KEY (name, kind));
+"""
+
+class Span:
+    __slots__ = ("_m", "stage", "bytes", "pages", "_t0")
+    def __init__(self, m, stage):
+        self._m = m; self.stage = stage; self.bytes = 0; self.pages = 0
+    def __enter__(self):
+        self._t0 = time.perf_counter(); return self
+    def __exit__(self, exc_type, exc, tb):
+        self._m.observe(self.stage, time.perf_counter() - self._t0, self.bytes, self.pages)
+        if exc_type is not None: self._m.count(self.stage + ".errors")
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+    bytes = pages = 0
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def __setattr__(self, k, v): pass
+
+_NULL = _NullSpan()
+
+class Metrics:
+    def __init__(self, path: Path = Path("cache/metrics.sqlite"), enabled: bool = True, flush_every: float = 5.0):
+        self.path = Path(path); self.enabled = enabled; self.flush_every = flush_every
+        self._pending = {}; self._last = time.monotonic()
+        self._lock = threading.Lock(); self._ready = False
+
+    @contextmanager
+    def _conn(self):
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            c = sqlite3.connect(self.path, timeout=30)
+            c.execute("PRAGMA journal_mode=WAL"); c.executescript(SCHEMA); c.close()
+            self._ready = True
+        c = sqlite3.connect(self.path, timeout=30)
+        try:
+            with c: yield c
+        finally:
+            c.close()
+
+    def span(self, stage: str):
+        return Span(self, stage) if self.enabled else _NULL
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled: self._add(name, "counter", n, 0.0, 0, 0)
+
+    def observe(self, stage: str, seconds: float, nbytes: int = 0, pages: int = 0):
+        if self.enabled: self._add(stage, "span", 1, seconds, nbytes, pages)
+
+    def _add(self, name, kind, n, seconds, nbytes, pages):
+        with self._lock:
+            e = self._pending.get((name, kind))
+            if e is None: e = self._pending[(name, kind)] = [0, 0.0, 0.0, 0, 0, [0]*(len(BUCKETS)+1)]
+            e[0] += n; e[1] += seconds; e[2] = max(e[2], seconds); e[3] += int(nbytes or 0); e[4] += int(pages or 0)
+            if kind == "span": e[5][bisect_left(BUCKETS, seconds)] += 1
+            due = time.monotonic() - self._last >= self.flush_every
+        if due: self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last = time.monotonic()
+        if not pending: return
+        try:
+            with self._conn() as c:
+                c.execute("BEGIN IMMEDIATE")   # read-modify-write: take the write lock up front
+                for (name, kind), (n, total, mx, nbytes, pages, buckets) in pending.items():
+                    row = c.execute("SELECT count, total, max, bytes, pages, buckets FROM metrics WHERE name=? AND kind=?",
+                                    (name, kind)).fetchone()
+                    if row:
+                        old = json.loads(row[5])
+                        n += row[0]; total += row[1]; mx = max(mx, row[2]); nbytes += row[3]; pages += row[4]
+                        buckets = [a + b for a, b in zip(buckets, old)]
+                    c.execute("INSERT OR REPLACE INTO metrics VALUES (?,?,?,?,?,?,?,?,?)",
+                              (name, kind, n, total, mx, nbytes, pages, json.dumps(buckets), time.time()))
+        except Exception:
+            # metrics must never break an audit; keep the numbers for the next flush
+            with self._lock:
+                for k, e in pending.items():
+                    cur = self._pending.get(k)
+                    if cur is None: self._pending[k] = e; continue
+                    cur[0] += e[0]; cur[1] += e[1]; cur[2] = max(cur[2], e[2]); cur[3] += e[3]; cur[4] += e[4]
+                    cur[5] = [x + y for x, y in zip(cur[5], e[5])]
+
+    def rows(self) -> list[tuple]:
+        self.flush()
+        with self._conn() as c:
+            return c.execute("SELECT name, kind, count, total, max, bytes, pages, buckets FROM metrics ORDER BY name").fetchall()
+
+    def reset(self):
+        with self._lock: self._pending = {}
+        with self._conn() as c: c.execute("DELETE FROM metrics")
+
+    def _after_fork(self):
+        # forked pool workers must not re-report the parent's unflushed numbers
+        self._pending = {}; self._lock = threading.Lock(); self._last = time.monotonic()
+        mp_util.Finalize(self, self.flush, exitpriority=10)
+
+METRICS = Metrics(Path(os.environ.get("SEKER_CACHE_DIR", "cache")) / "metrics.sqlite",
+                  enabled=os.environ.get("SEKER_METRICS", "1") != "0")
+atexit.register(METRICS.flush)
+# pool workers leave through multiprocessing's exit path, which skips atexit
+mp_util.Finalize(METRICS, METRICS.flush, exitpriority=10)
+mp_util.register_after_fork(METRICS, Metrics._after_fork)
+
+def _quantile(buckets: list[int], count: int, q: float, mx: float) -> float:
+    # upper bound of the histogram bucket holding the q-quantile
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if count and seen >= q * count: return min(BUCKETS[i], mx) if i < len(BUCKETS) else mx
+    return mx
+
+def summary(m: Metrics = METRICS):
+    import pandas as pd
+    spans, counters = [], []
+    for name, kind, n, total, mx, nbytes, pages, buckets in m.rows():
+        if kind == "counter":
+            counters.append({"Counter": name, "Count": n}); continue
+        b = json.loads(buckets)
+        spans.append({"Stage": name, "Calls": n, "Total s": round(total, 3), "Mean ms": round(1000*total/n, 1) if n else 0,
+                      "p50 ms": round(1000*_quantile(b, n, 0.5, mx), 1), "p95 ms": round(1000*_quantile(b, n, 0.95, mx), 1),
+                      "Max ms": round(1000*mx, 1), "MB": round(nbytes/1e6, 2), "Pages": pages,
+                      "Pages/s": round(pages/total, 1) if (pages and total) else None})
+    return pd.DataFrame(spans), pd.DataFrame(counters)
+
+def _label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text(m: Metrics = METRICS, prefix: str = "seker") -> str:
+    rows = m.rows()
+    out = [f"# HELP {prefix}_stage_seconds Time spent per processing stage.", f"# TYPE {prefix}_stage_seconds histogram"]
+    spans = [r for r in rows if r[1] == "span"]
+    for name, _, n, total, mx, nbytes, pages, buckets in spans:
+        lbl = f'stage="{_label(name)}"'; seen = 0
+        for le, c in zip(BUCKETS + ("+Inf",), json.loads(buckets)):
+            seen += c; out.append(f'{prefix}_stage_seconds_bucket{{{lbl},le="{le}"}} {seen}')
+        out += [f"{prefix}_stage_seconds_sum{{{lbl}}} {total:.6f}", f"{prefix}_stage_seconds_count{{{lbl}}} {n}"]
+    for metric, idx, help_ in (("stage_seconds_max", 4, "Slowest single call per stage."),
+                               ("stage_bytes_total", 5, "Bytes processed per stage."),
+                               ("stage_pages_total", 6, "Pages processed per stage.")):
+        out += [f"# HELP {prefix}_{metric} {help_}", f"# TYPE {prefix}_{metric} {'gauge' if idx == 4 else 'counter'}"]
+        out += [f'{prefix}_{metric}{{stage="{_label(r[0])}"}} {r[idx]}' for r in spans]
+    out += [f"# HELP {prefix}_events_total Event counters.", f"# TYPE {prefix}_events_total counter"]
+    out += [f'{prefix}_events_total{{name="{_label(r[0])}"}} {r[2]}' for r in rows if r[1] == "counter"]
+    return "\n".join(out) + "\n"
+
+def write_prometheus(path: Path, m: Metrics = METRICS) -> Path:
+    # for node_exporter's textfile collector or any file-based scraper
+    path = Path(path); path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(prometheus_text(m)); os.replace(tmp, path)
+    return path
+
+_SERVER = None
+
+def serve(port: int = 9108, host: str = "127.0.0.1", m: Metrics = METRICS):
+    # /metrics endpoint on a daemon thread; started at most once per process
+    global _SERVER
+    if _SERVER is not None: return _SERVER
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404); return
+            body = prometheus_text(m).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body))); self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args): pass
+    _SERVER = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_SERVER.serve_forever, daemon=True, name="metrics").start()
+    return _SERVER
+
+if __name__ == "__main__":
+    # python -m modules.metrics [out.prom]  -> write once, or print to stdout
+    if len(sys.argv) > 1: print(f"Wrote {write_prometheus(Path(sys.argv[1]))}")
+    else: sys.stdout.write(prometheus_text())
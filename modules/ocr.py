@@ -0,0 +1,106 @@
+import hashlib, json, multiprocessing, os, shutil, subprocess
+from concurrent.futures import ProcessPoolExecutor
+from .text_cache import TEXT_CACHE
+from .metrics import METRICS
+from .pools import init_worker, mp_context, worker_settings
+
+# OCR fallback for scanned pages, using the tesseract CLI installed by the Dockerfile.
+# Only pages without a text layer are rendered (at OCR["dpi"]) and recognised; results
+# are cached in the text cache by a hash of the page's content stream and images, so a
+# re-issued drawing only re-OCRs the sheets that changed. Words come back in PDF points
+# in the same (x0, y0, x1, y1, text, block, line, word) shape as fitz "words".
+
+OCR = {"enabled": True, "dpi": 300, "lang": "eng", "timeout": 300}
+_TESSERACT = None
+
+def available() -> bool:
+    global _TESSERACT
+    if _TESSERACT is None: _TESSERACT = shutil.which("tesseract") or ""
+    return bool(_TESSERACT)
+
+def enabled() -> bool:
+    return bool(OCR.get("enabled")) and available()
+
+def page_hash(page) -> str:
+    # cheap content identity: drawing operators, embedded image streams, geometry
+    doc = page.parent
+    h = hashlib.sha256(page.read_contents())
+    for img in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    h.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    return h.hexdigest()
+
+def parse_tsv(tsv: str, scale: float) -> list[tuple]:
+    # tesseract tsv: level page block par line word left top width height conf text
+    words = []
+    for line in tsv.splitlines()[1:]:
+        f = line.split("\t")
+        if len(f) < 12 or f[0] != "5" or not f[11].strip() or float(f[10]) < 0: continue
+        l, t, w, h = (int(v) for v in f[6:10])
+        words.append((l*scale, t*scale, (l+w)*scale, (t+h)*scale, f[11].strip(),
+                      int(f[2]), int(f[3])*1000 + int(f[4]), int(f[5])))
+    return words
+
+def tesseract(png: bytes, dpi: int, lang: str) -> str:
+    r = subprocess.run([_TESSERACT or "tesseract", "stdin", "stdout", "--dpi", str(dpi), "-l", lang, "tsv"],
+                       input=png, capture_output=True, timeout=OCR["timeout"])
+    if r.returncode != 0: raise RuntimeError(r.stderr.decode("utf-8", "replace").strip() or "tesseract failed")
+    return r.stdout.decode("utf-8", "replace")
+
+def page_words(page, dpi: int | None = None, lang: str | None = None) -> list[tuple]:
+    # text-layer words when present, otherwise (cached) OCR words
+    words = page.get_text("words")
+    if words or not enabled(): return words
+    import fitz
+    dpi = int(dpi or OCR["dpi"]); lang = lang or OCR["lang"]
+    sha, kind = page_hash(page), f"ocr:1:{lang}:{dpi}"
+    try: hit = TEXT_CACHE.get(sha, kind)
+    except Exception: hit = None
+    if hit is not None:
+        METRICS.count("ocr.cache_hit"); return [tuple(w) for w in json.loads(hit[0])]
+    with METRICS.span("ocr.page") as s:
+        png = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY).tobytes("png")
+        derot = page.derotation_matrix
+        out = []
+        for w in parse_tsv(tesseract(png, dpi, lang), 72.0 / dpi):
+            r = fitz.Rect(w[:4]) * derot
+            out.append((r.x0, r.y0, r.x1, r.y1, *w[4:]))
+        s.pages = 1; s.bytes = len(png)
+    try: TEXT_CACHE.put(sha, kind, [json.dumps(out)])
+    except Exception: pass
+    return out
+
+def words_text(words) -> str:
+    lines, key = [], None
+    for w in words:
+        if (w[5], w[6]) != key: lines.append([]); key = (w[5], w[6])
+        lines[-1].append(w[4])
+    return "\n".join(" ".join(l) for l in lines)
+
+def _open(src):
+    import fitz
+    return fitz.open(stream=bytes(src), filetype="pdf") if isinstance(src, (bytes, bytearray, memoryview)) else fitz.open(src)
+
+def _ocr_chunk(args):
+    src, pages, dpi, lang = args
+    with _open(src) as doc:
+        out = {}
+        for n in pages:
+            try: out[n] = page_words(doc[n], dpi, lang)
+            except Exception: out[n] = []
+        return out
+
+def ocr_pages(src, pages, workers: int | None = None, dpi: int | None = None, lang: str | None = None) -> dict:
+    # src: pdf path or bytes; pages: 0-based indexes -> {index: words}
+    pages = list(pages)
+    if not pages or not enabled(): return {}
+    workers = workers or os.cpu_count() or 1
+    if multiprocessing.parent_process() is not None: workers = 1   # already inside a worker pool
+    src = src if isinstance(src, (bytes, bytearray)) else str(src)
+    if workers <= 1 or len(pages) <= 1: return _ocr_chunk((src, pages, dpi, lang))
+    tasks = [(src, pages[i::workers], dpi, lang) for i in range(min(workers, len(pages)))]
+    out = {}
+    with ProcessPoolExecutor(max_workers=len(tasks), mp_context=mp_context(),
+                             initializer=init_worker, initargs=(worker_settings(),)) as ex:
+        for part in ex.map(_ocr_chunk, tasks): out.update(part)
+    return out
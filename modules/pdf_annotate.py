@@ -1,8 +1,45 @@
+import os, shutil
 from pathlib import Path
+from .render_cache import render_page
+from .design_audit import tokens, _match_page
+from .ocr import page_words
+from .metrics import METRICS
+from .ingest import as_source, open_pdf
 
-def annotate_text_matches(pdf_path: Path, out_path: Path, matches: list[dict]):
+# Every annotate_* takes a path, ZipMember or in-memory buffer. With out_path the source is
+# copied there (a kernel-side copy for files) and only the new annotations are appended as an
+# incremental update, never a full rewrite; with out_path=None the annotated PDF is returned
+# as bytes without touching the disk.
+
+def _begin(src, out_path):
+    if out_path is None: return open_pdf(src)
+    import fitz
+    out_path = Path(out_path); out_path.parent.mkdir(parents=True, exist_ok=True)
+    src = as_source(src)
+    if not isinstance(src, Path):
+        data = src.read_bytes()
+        with open(out_path, "wb") as f: f.write(data)
+    elif not out_path.exists() or not os.path.samefile(src, out_path):
+        shutil.copyfile(src, out_path)
+    return fitz.open(out_path)
+
+def _finish(doc, out_path, incremental: bool = True):
+    with METRICS.span("annotate.save") as s:
+        s.pages = len(doc)
+        if out_path is None:
+            data = doc.tobytes(garbage=0, deflate=False); doc.close()
+            s.bytes = len(data); return data
+        if incremental and doc.can_save_incrementally():
+            doc.saveIncr(); doc.close()
+        else:
+            tmp = Path(out_path).with_suffix(f".{os.getpid()}.tmp")
+            doc.save(tmp, garbage=1, deflate=True); doc.close(); os.replace(tmp, out_path)
+        s.bytes = Path(out_path).stat().st_size
+    return Path(out_path)
+
+def annotate_text_matches(pdf_path, out_path: Path | None, matches: list[dict], incremental: bool = True):
     import fitz
-    doc = fitz.open(pdf_path)
+    doc = _begin(pdf_path, out_path)
     for m in matches:
         page_no = int(m.get("page",1))-1
         text = m.get("text","")
@@ -11,27 +48,40 @@ def annotate_text_matches(pdf_path: Path, out_path: Path, matches: list[dict]):
             page = doc[page_no]
         except Exception:
             continue
-        rects = page.search_for(text, quads=False, hit_max=16)
+        rects = page.search_for(text, quads=False)[:16]
+        if not rects and not page.get_text("text").strip():
+            # scanned sheet: locate the text among OCR word boxes
+            toks = tuple(tokens(text))
+            rects = [fitz.Rect(r) for r in _match_page(page_words(page), [toks]).get(toks, [])] if toks else []
         if rects:
             for r in rects:
                 page.add_text_annot(r.br, note)
         else:
             page.add_text_annot((36,36), f"[Missing] {note}")
-    doc.save(out_path)
+    return _finish(doc, out_path, incremental)
 
-def render_page_image(pdf_path: Path, page: int, zoom: float=2.0) -> bytes:
+def annotate_marks(pdf_path, out_path: Path | None, marks: list[dict], incremental: bool = True):
+    # marks carry pre-located rects (see design_audit); rect None means "not found" and is stacked top-left
     import fitz
-    doc = fitz.open(pdf_path)
-    p = doc[page-1]
-    mat = fitz.Matrix(zoom, zoom)
-    pix = p.get_pixmap(matrix=mat)
-    img_bytes = pix.tobytes("png")
-    doc.close()
-    return img_bytes
+    doc = _begin(pdf_path, out_path)
+    stacked = {}
+    for m in marks:
+        try:
+            page = doc[int(m.get("page",1))-1]
+        except Exception:
+            continue
+        if m.get("rect"):
+            page.add_text_annot(fitz.Rect(m["rect"]).br, m.get("note",""))
+        else:
+            k = stacked[page.number] = stacked.get(page.number, -1) + 1
+            page.add_text_annot((36, 36 + 18*k), m.get("note",""))
+    return _finish(doc, out_path, incremental)
 
-def annotate_points(pdf_path: Path, out_path: Path, points: list[dict]):
-    import fitz
-    doc = fitz.open(pdf_path)
+def render_page_image(pdf_path, page: int, zoom: float=2.0) -> bytes:
+    return render_page(pdf_path, page, zoom)
+
+def annotate_points(pdf_path, out_path: Path | None, points: list[dict], incremental: bool = True):
+    doc = _begin(pdf_path, out_path)
     for p in points:
         page_no = int(p.get("page",1))-1
         x, y = float(p.get("x",72)), float(p.get("y",72))
@@ -41,4 +91,4 @@ def annotate_points(pdf_path: Path, out_path: Path, points: list[dict]):
         except Exception:
             continue
         page.add_text_annot((x,y), note)
-    doc.save(out_path)
+    return _finish(doc, out_path, incremental)
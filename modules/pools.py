@@ -0,0 +1,72 @@
+import multiprocessing, sys, threading, types
+from multiprocessing.context import ForkServerContext, ForkServerProcess, SpawnContext, SpawnProcess
+
+# Start method for every process pool in the app. The Streamlit server is multi-threaded
+# (Tornado, job callbacks, metrics server, report evictor), so workers are never forked from
+# it: they come from a forkserver that has preloaded the worker modules, or are spawned where
+# forkserver is unavailable. Both would re-run __main__.__file__ in each new worker, which
+# under `streamlit run` is the app script, so a script __main__ is hidden while a worker is
+# launched. A `python -m` main is left alone: workers re-import it by name, guard and all,
+# and functions defined in it (batch._audit_one under `-m modules.batch`) stay picklable.
+#
+# Workers don't inherit the parent's runtime config either (text cache size, OCR options,
+# metrics on/off), so pools pass it through init_worker, chaining their own initializer (job
+# workers instead re-read the settings for every job, see jobs._run):
+#
+#   ProcessPoolExecutor(max_workers=n, mp_context=mp_context(),
+#                       initializer=init_worker, initargs=(worker_settings(), own_init, *own_args))
+
+PRELOAD = ["modules.jobs", "modules.ingest", "modules.design_audit", "modules.ocr"]
+_MAIN_LOCK = threading.Lock()
+_CTX = None
+
+def _launch(popen, process_obj):
+    with _MAIN_LOCK:
+        main = sys.modules.get("__main__")
+        if getattr(getattr(main, "__spec__", None), "name", None): return popen(process_obj)
+        sys.modules["__main__"] = types.ModuleType("__main__")   # no __file__ / __spec__ to re-run
+        try:
+            return popen(process_obj)
+        finally:
+            if main is None: sys.modules.pop("__main__", None)
+            else: sys.modules["__main__"] = main
+
+class _ForkServerProcess(ForkServerProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _launch(ForkServerProcess._Popen, process_obj)
+
+class _SpawnProcess(SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _launch(SpawnProcess._Popen, process_obj)
+
+class _ForkServerContext(ForkServerContext):
+    Process = _ForkServerProcess
+
+class _SpawnContext(SpawnContext):
+    Process = _SpawnProcess
+
+def mp_context():
+    global _CTX
+    if _CTX is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = _ForkServerContext(); ctx.set_forkserver_preload(PRELOAD)
+        else:
+            ctx = _SpawnContext()
+        _CTX = ctx
+    return _CTX
+
+def worker_settings() -> dict:
+    # snapshot of this process's config, taken when a pool is created
+    from .text_cache import TEXT_CACHE
+    from .ocr import OCR
+    from .metrics import METRICS
+    return {"text_max_bytes": TEXT_CACHE.max_bytes, "ocr": dict(OCR), "metrics": METRICS.enabled}
+
+def init_worker(settings: dict, init=None, *args):
+    from .text_cache import TEXT_CACHE
+    from .ocr import OCR
+    from .metrics import METRICS
+    TEXT_CACHE.max_bytes = settings["text_max_bytes"]; OCR.update(settings["ocr"]); METRICS.enabled = settings["metrics"]
+    if init is not None: init(*args)
@@ -0,0 +1,105 @@
+import hashlib, os, threading
+from collections import OrderedDict
+from pathlib import Path
+from .metrics import METRICS
+
+# Rendered page PNGs keyed by (pdf sha256, page, zoom): an in-memory LRU in front of
+# an on-disk tier, both with byte budgets. render_progressive returns a quick
+# low-zoom preview when the full render isn't cached yet so the UI can draw at once.
+
+class RenderCache:
+    def __init__(self, disk_dir: Path = Path("cache/render"), mem_bytes: int = 256*1024*1024,
+                 disk_bytes: int = 2*1024*1024*1024):
+        self.disk_dir = Path(disk_dir); self.mem_bytes = mem_bytes; self.disk_bytes = disk_bytes
+        self._mem = OrderedDict(); self._mem_used = 0
+        self._disk_used = None
+        self._lock = threading.Lock()
+
+    def _file(self, key) -> Path:
+        sha, page, zoom = key
+        return self.disk_dir / sha[:2] / sha / f"p{page}_z{zoom:g}.png"
+
+    def get(self, key):
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key); return data
+        f = self._file(key)
+        try:
+            data = f.read_bytes(); os.utime(f)
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data: bytes):
+        self._remember(key, data)
+        f = self._file(key); f.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data); os.replace(tmp, f)
+        with self._lock:
+            if self._disk_used is not None: self._disk_used += len(data)
+        self._evict_disk()
+
+    def _remember(self, key, data: bytes):
+        if len(data) > self.mem_bytes: return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None: self._mem_used -= len(old)
+            self._mem[key] = data; self._mem_used += len(data)
+            while self._mem_used > self.mem_bytes:
+                _, d = self._mem.popitem(last=False); self._mem_used -= len(d)
+
+    def _evict_disk(self):
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(p.stat().st_size for p in self.disk_dir.rglob("*.png"))
+            if self._disk_used <= self.disk_bytes: return
+            files = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self.disk_dir.rglob("*.png")))
+            for _, size, p in files:
+                try: p.unlink()
+                except OSError: continue
+                self._disk_used -= size
+                if self._disk_used <= self.disk_bytes * 0.9: break
+
+RENDER_CACHE = RenderCache(Path(os.environ.get("SEKER_CACHE_DIR", "cache")) / "render")
+_INFO: dict = {}
+
+def source_digest(src) -> str:
+    if isinstance(src, (bytes, bytearray, memoryview)): return hashlib.sha256(src).hexdigest()
+    from .ingest import file_digest, as_source
+    return file_digest(as_source(src))
+
+def _open(src):
+    from .ingest import open_pdf
+    return open_pdf(src)
+
+def page_sizes(src, sha: str | None = None) -> list[tuple[float, float]]:
+    sha = sha or source_digest(src)
+    sizes = _INFO.get(sha)
+    if sizes is None:
+        with _open(src) as doc: sizes = [(p.rect.width, p.rect.height) for p in doc]
+        if len(_INFO) > 256: _INFO.clear()
+        _INFO[sha] = sizes
+    return sizes
+
+def render_page(src, page: int, zoom: float = 2.0, sha: str | None = None) -> bytes:
+    sha = sha or source_digest(src)
+    key = (sha, int(page), round(float(zoom), 3))
+    data = RENDER_CACHE.get(key)
+    if data is None:
+        import fitz
+        with METRICS.span("render.page") as s, _open(src) as doc:
+            data = doc[page-1].get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+            s.pages = 1; s.bytes = len(data)
+        RENDER_CACHE.put(key, data)
+    else:
+        METRICS.count("render_cache.hit")
+    return data
+
+def render_progressive(src, page: int, zoom: float = 2.0, preview_zoom: float = 0.5, sha: str | None = None):
+    # -> (png, zoom_used, final); call render_page(...) afterwards to sharpen when not final
+    sha = sha or source_digest(src)
+    data = RENDER_CACHE.get((sha, int(page), round(float(zoom), 3)))
+    if data is not None or preview_zoom >= zoom: return (data or render_page(src, page, zoom, sha)), zoom, True
+    return render_page(src, page, preview_zoom, sha), preview_zoom, False
@@ -0,0 +1,191 @@
+import hashlib, json, os, shutil, sqlite3, threading, time, uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+from .metrics import METRICS
+
+# Content-addressed store for uploads and generated reports. Blobs live at
+# objects/<aa>/<sha256><ext> and are written via a temp file + os.replace, so identical
+# content is stored once and concurrent writers (threads, job workers, replicas sharing
+# the directory) never see partial files. Artifact rows record what produced each blob
+# (kind, display name, job key, input hash); eviction by age and total size removes blobs
+# and leaves the rows as tombstones so callers can tell an output has expired.
+# The database uses a rollback journal rather than WAL so it also works on network storage.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (sha TEXT PRIMARY KEY, ext TEXT, size INTEGER, created_at REAL, last_used REAL);
+CREATE INDEX IF NOT EXISTS objects_lru ON objects(last_used);
+CREATE TABLE IF NOT EXISTS artifacts (id INTEGER PRIMARY KEY AUTOINCREMENT, sha TEXT NOT NULL, ext TEXT, name TEXT,
+    kind TEXT, key TEXT, input_sha TEXT, meta TEXT, created_at REAL, evicted_at REAL);
+CREATE INDEX IF NOT EXISTS artifacts_key ON artifacts(key, kind);
+CREATE INDEX IF NOT EXISTS artifacts_sha ON artifacts(sha);
+"""
+
+class Artifact(NamedTuple):
+    sha: str
+    name: str
+    kind: str
+    path: Path
+    size: int
+    key: str | None = None
+
+class ReportStore:
+    def __init__(self, root: Path = Path("reports"), max_bytes: int = 2*1024*1024*1024, max_age_days: float = 30):
+        self.root = Path(root); self.max_bytes = max_bytes; self.max_age_days = max_age_days
+        self._ready = False; self._lock = threading.Lock(); self._evictor = None
+
+    @contextmanager
+    def _conn(self, write: bool = False):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    (self.root / "objects").mkdir(parents=True, exist_ok=True); (self.root / "tmp").mkdir(exist_ok=True)
+                    c = sqlite3.connect(self.root / "store.sqlite", timeout=60)
+                    c.executescript(SCHEMA); c.close()
+                    self._ready = True
+        c = sqlite3.connect(self.root / "store.sqlite", timeout=60)
+        try:
+            with c:
+                if write: c.execute("BEGIN IMMEDIATE")
+                yield c
+        finally:
+            c.close()
+
+    def object_path(self, sha: str, ext: str = "") -> Path:
+        return self.root / "objects" / sha[:2] / f"{sha}{ext}"
+
+    def tmp_path(self, suffix: str = "") -> Path:
+        (self.root / "tmp").mkdir(parents=True, exist_ok=True)
+        return self.root / "tmp" / f"{uuid.uuid4().hex}{suffix}"
+
+    def put(self, data, name: str, kind: str, key: str | None = None, input_sha: str | None = None,
+            meta: dict | None = None) -> Artifact:
+        # data: bytes, bytearray or memoryview; hashed and written without extra copies
+        with METRICS.span("reports.put") as s:
+            sha = hashlib.sha256(data).hexdigest(); s.bytes = size = memoryview(data).nbytes
+            art = None if not self._has_object(sha) else self._commit(sha, None, size, name, kind, key, input_sha, meta)
+            if art is None: art = self._commit(sha, self._write_tmp(data), size, name, kind, key, input_sha, meta)
+            return art
+
+    def _write_tmp(self, data) -> Path:
+        tmp = self.tmp_path()
+        with open(tmp, "wb") as f: f.write(data)
+        return tmp
+
+    def put_file(self, path: Path, name: str, kind: str, key: str | None = None, input_sha: str | None = None,
+                 meta: dict | None = None, move: bool = False) -> Artifact:
+        # move=True consumes path (e.g. a tmp_path() the caller wrote into)
+        with METRICS.span("reports.put") as s:
+            path = Path(path); h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024*1024), b""): h.update(chunk)
+            sha = h.hexdigest(); s.bytes = size = path.stat().st_size
+            def stage():
+                if move and path.parent == self.root / "tmp": return path
+                tmp = self.tmp_path(); shutil.copyfile(path, tmp); return tmp
+            art = None if not self._has_object(sha) else self._commit(sha, None, size, name, kind, key, input_sha, meta)
+            if art is None: art = self._commit(sha, stage(), size, name, kind, key, input_sha, meta)
+            if move: path.unlink(missing_ok=True)   # already gone if it was moved into place
+            return art
+
+    def _has_object(self, sha: str) -> bool:
+        with self._conn() as c:
+            row = c.execute("SELECT ext FROM objects WHERE sha=?", (sha,)).fetchone()
+        return row is not None and self.object_path(sha, row[0]).exists()
+
+    def _commit(self, sha, tmp, size, name, kind, key, input_sha, meta) -> Artifact | None:
+        # tmp=None: the blob was present at _has_object(); returns None if evict() removed it
+        # since then, and the caller retries with the bytes written to a temp file
+        ext = Path(name).suffix.lower(); now = time.time()
+        with self._conn(write=True) as c:
+            row = c.execute("SELECT ext FROM objects WHERE sha=?", (sha,)).fetchone()
+            if row is not None: ext = row[0]
+            dest = self.object_path(sha, ext)
+            if not dest.exists():
+                if tmp is None: return None
+                dest.parent.mkdir(parents=True, exist_ok=True); os.replace(tmp, dest)
+            elif tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+            c.execute("INSERT INTO objects VALUES (?,?,?,?,?) ON CONFLICT(sha) DO UPDATE SET last_used=excluded.last_used",
+                      (sha, ext, size, now, now))
+            hit = c.execute("SELECT id FROM artifacts WHERE sha=? AND name=? AND kind=? AND key IS ? AND evicted_at IS NULL",
+                            (sha, name, kind, key)).fetchone()
+            if hit is None:
+                c.execute("INSERT INTO artifacts (sha, ext, name, kind, key, input_sha, meta, created_at) VALUES (?,?,?,?,?,?,?,?)",
+                          (sha, ext, name, kind, key, input_sha, json.dumps(meta or {}, default=str), now))
+        return Artifact(sha, name, kind, dest, size, key)
+
+    def find(self, key: str | None = None, kind: str | None = None, input_sha: str | None = None) -> Artifact | None:
+        # newest live artifact matching every given field; touching it keeps it from eviction
+        where, args = ["a.evicted_at IS NULL"], []
+        for col, v in (("a.key", key), ("a.kind", kind), ("a.input_sha", input_sha)):
+            if v is not None: where.append(f"{col}=?"); args.append(v)
+        with self._conn() as c:
+            row = c.execute("SELECT a.sha, a.name, a.kind, o.ext, o.size, a.key FROM artifacts a JOIN objects o ON o.sha=a.sha "
+                            f"WHERE {' AND '.join(where)} ORDER BY a.created_at DESC LIMIT 1", args).fetchone()
+            if row is None: return None
+            art = Artifact(row[0], row[1], row[2], self.object_path(row[0], row[3]), row[4], row[5])
+            if not art.path.exists(): return None
+            c.execute("UPDATE objects SET last_used=? WHERE sha=?", (time.time(), art.sha))
+        return art
+
+    def expired(self, key: str) -> bool:
+        # True when an output recorded under key (by kind and name) has been evicted and not re-made
+        with self._conn() as c:
+            rows = c.execute("SELECT sha, ext, kind, name, evicted_at FROM artifacts WHERE key=?", (key,)).fetchall()
+        live, dead = set(), set()
+        for sha, ext, kind, name, ev in rows:
+            (dead if ev is not None or not self.object_path(sha, ext).exists() else live).add((kind, name))
+        return bool(dead - live)
+
+    def stats(self) -> dict:
+        with self._conn() as c:
+            n, size = c.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM objects").fetchone()
+            arts = c.execute("SELECT COUNT(*) FROM artifacts WHERE evicted_at IS NULL").fetchone()[0]
+        return {"objects": n, "bytes": size, "artifacts": arts}
+
+    def evict(self, now: float | None = None) -> dict:
+        # age first, then least-recently-used until under max_bytes; rows are removed under the
+        # write lock so a concurrent put() either sees the object gone or refreshes it first
+        now = now or time.time(); cutoff = now - self.max_age_days * 86400
+        victims = []
+        with self._conn(write=True) as c:
+            rows = c.execute("SELECT sha, ext, size, last_used FROM objects ORDER BY last_used").fetchall()
+            total = sum(r[2] for r in rows)
+            for sha, ext, size, last_used in rows:
+                if last_used >= cutoff and total <= self.max_bytes: break
+                victims.append((sha, ext)); total -= size
+            for sha, ext in victims:
+                c.execute("DELETE FROM objects WHERE sha=?", (sha,))
+                c.execute("UPDATE artifacts SET evicted_at=? WHERE sha=? AND evicted_at IS NULL", (now, sha))
+                self.object_path(sha, ext).unlink(missing_ok=True)
+        freed = sum(r[2] for r in rows) - total
+        for t in (self.root / "tmp").glob("*"):
+            try:
+                if t.stat().st_mtime < now - 86400: t.unlink()
+            except OSError:
+                pass
+        METRICS.count("reports.evicted", len(victims))
+        return {"evicted": len(victims), "bytes": freed}
+
+    def start_evictor(self, interval: float = 600.0):
+        # background eviction, one daemon thread per process
+        with self._lock:
+            if self._evictor is not None: return
+            def loop():
+                while True:
+                    try: self.evict()
+                    except Exception: pass
+                    time.sleep(interval)
+            self._evictor = threading.Thread(target=loop, daemon=True, name="report-evictor")
+            self._evictor.start()
+
+REPORTS = ReportStore()
+
+def configure(cfg) -> ReportStore:
+    # the app_settings.yaml "reports" section
+    root = Path(cfg.get("root", "reports"))
+    if root != REPORTS.root: REPORTS.root = root; REPORTS._ready = False
+    REPORTS.max_bytes = int(cfg.get("max_mb", 2048))*1024*1024
+    REPORTS.max_age_days = float(cfg.get("max_age_days", 30))
+    return REPORTS
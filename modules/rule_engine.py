@@ -0,0 +1,136 @@
+import functools, re, json, hashlib, threading
+from collections import deque
+from .metrics import METRICS
+from .features import scan, latest_age_days
+
+DOC_TYPES = {"doc_text_presence", "doc_date_recency", "doc_link_presence"}
+# document features each rule type reads (see features.py)
+RULE_FEATURES = {"doc_date_recency": "dates", "doc_link_presence": "links"}
+
+def ruleset_version(rules: dict) -> str:
+    if rules.get("version"): return rules["version"]
+    blob = json.dumps(rules.get("rules", []), sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+class LiteralMatcher:
+    # Aho-Corasick automaton over lowercased literals; one pass reports every term present.
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(t for t in terms if t))
+        goto = [{}]; out = [set()]
+        for i, t in enumerate(self.terms):
+            s = 0
+            for ch in t:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto); goto[s][ch] = nxt; goto.append({}); out.append(set())
+                s = nxt
+            out[s].add(i)
+        fail = [0] * len(goto)
+        q = deque(goto[0].values())
+        while q:
+            s = q.popleft()
+            for ch, nxt in goto[s].items():
+                q.append(nxt)
+                f = fail[s]
+                while f and ch not in goto[f]: f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] |= out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def search(self, text: str) -> set:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(); remaining = len(self.terms); s = 0
+        if not remaining: return found
+        for ch in text:
+            while s and ch not in goto[s]: s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                new = out[s] - found
+                if new:
+                    found |= new
+                    if len(found) == remaining: break
+        return {self.terms[i] for i in found}
+
+class CompiledRuleset:
+    def __init__(self, rules: dict):
+        self.version = ruleset_version(rules)
+        self.rules = []
+        self.features = set()
+        literals = []
+        for r in rules.get("rules", []):
+            rtype = r.get("type")
+            if rtype not in DOC_TYPES: continue
+            opts = r.get("options", {}) or {}
+            sec = opts.get("section")
+            entry = {"id": r.get("id"), "type": rtype, "description": r.get("description",""),
+                     "severity": r.get("severity","minor"),
+                     "sections": (sec,) if isinstance(sec, str) else (tuple(sec) if sec else None)}
+            if rtype == "doc_text_presence":
+                entry["any"] = [t.lower() for t in opts.get("any", [])]
+                entry["all"] = [t.lower() for t in opts.get("all", [])]
+                entry["any_regex"] = [compile_pattern(p) for p in opts.get("any_regex", [])]
+                literals.extend(entry["any"]); literals.extend(entry["all"])
+            if rtype in RULE_FEATURES: self.features.add(RULE_FEATURES[rtype])
+            self.rules.append(entry)
+        self.matcher = LiteralMatcher(literals)
+
+    def evaluate(self, text: str, sections: dict | None = None, features: dict | None = None) -> list[dict]:
+        # sections: {section: text} (see ingest.section_texts); rules with options.section are
+        # checked against those sections only, or against the whole text when none are known.
+        # features: precomputed whole-text record (ingest.document_features), else scanned on demand
+        with METRICS.span("rules.evaluate") as s:
+            s.bytes = len(text)
+            return self._evaluate(text, sections, features)
+
+    def _evaluate(self, text: str, sections: dict | None, features: dict | None) -> list[dict]:
+        present = self.matcher.search(text.lower())
+        present.add("")
+        scopes = {None: {"text": text}}
+        if features is not None and self.features <= features.keys(): scopes[None]["feat"] = features
+        findings = []
+        for e in self.rules:
+            key = e["sections"] if (e["sections"] and sections is not None) else None
+            ctx = scopes.get(key)
+            if ctx is None:
+                body = "\n".join(sections.get(s, "") for s in key)
+                ctx = scopes[key] = {"text": body, "lower": body.lower()}
+            scope = ctx["text"]
+            has = present.__contains__ if key is None else (lambda t, low=ctx["lower"]: t in low)
+            ok = True; detail = ""
+            if e["type"] == "doc_text_presence":
+                ok_any = True if not e["any"] else any(has(t) for t in e["any"])
+                ok_all = True if not e["all"] else all(has(t) for t in e["all"])
+                ok_rgx = True if not e["any_regex"] else any(rx.search(scope) for rx in e["any_regex"])
+                ok = ok_any and ok_all and ok_rgx
+                if not ok: detail = "Missing terms/regex"
+            elif e["type"] in RULE_FEATURES:
+                if "feat" not in ctx: ctx["feat"] = scan(scope, self.features)
+                feat = ctx["feat"]
+                if e["type"] == "doc_date_recency":
+                    age = latest_age_days(feat)
+                    if not feat["date_strings"]: ok=False; detail="No date string found."
+                    elif age is not None and age>730: ok=False; detail="Latest date appears older than 2 years."
+                else:
+                    ok = bool(feat["links"])
+                    if not ok: detail="No link-like strings found."
+            if not ok:
+                findings.append({"Rule": e["id"], "Description": e["description"], "Severity": e["severity"], "Detail": detail})
+        return findings
+
+_COMPILED: dict = {}
+_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=1024)   # bounded: mined/edited rulesets keep bringing new patterns
+def compile_pattern(p: str):
+    return re.compile(p, re.I)
+
+def compile_ruleset(rules: dict, max_cached: int = 8) -> CompiledRuleset:
+    if isinstance(rules, CompiledRuleset): return rules
+    v = ruleset_version(rules)
+    with _LOCK:
+        cr = _COMPILED.get(v)
+        if cr is None:
+            with METRICS.span("rules.compile"): cr = CompiledRuleset(rules)
+            while len(_COMPILED) >= max_cached: _COMPILED.pop(next(iter(_COMPILED)))
+            _COMPILED[v] = cr
+    return cr
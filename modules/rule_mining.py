@@ -1,27 +1,119 @@
 from pathlib import Path
-import re, pandas as pd
-from .ingest import docx_text, pdf_text
+import re, hashlib
+import numpy as np, pandas as pd
+from .ingest import extract_segments, as_source
+from .metrics import METRICS
 
 HINT = re.compile(r'\b(shall|must|required|shall not|do not|ensure|prohibit|forbidden)\b', re.I)
+STRONG = re.compile(r'\b(?:shall|must|required|shall not)\b', re.I)
+SENT_END = re.compile(r'(?<=[\.!?])\s+|\n\s*\n|\n\s*(?=[•\-\*]|\d+[\.\)]\s)')
 
 def sentences(text: str):
     parts = re.split(r'(?<=[\.!?])\s+', text or "")
     return [p.strip() for p in parts if len(p.strip())>0]
 
-def mine_rules_from_file(path: Path, max_items: int = 120):
-    text = (docx_text(path) if path.suffix.lower()==".docx" else pdf_text(path)) or ""
-    candidates = [s for s in sentences(text) if HINT.search(s)]
-    rows = []
-    for s in candidates[:max_items]:
-        desc = s[:220]
-        tokens = re.findall(r'[A-Za-z0-9\-]{3,}', s)[:10]
-        pattern = '\\b' + '\\s+'.join([re.escape(t) for t in tokens[:5]]) + '\\b' if tokens else re.escape(desc[:40])
-        rows.append({
-            "id": f"R_{abs(hash(path.name + s))%10**9}",
-            "type": "doc_text_presence",
-            "severity": "major" if re.search(r'\b(shall|must|required|shall not)\b', s, re.I) else "minor",
-            "description": desc,
-            "options": {"any": [desc[:120]], "any_regex": [pattern]},
-            "source": path.name
-        })
-    return pd.DataFrame(rows)
+def iter_sentences(text: str):
+    # streaming splitter: sentence ends, blank lines and bullet/numbered list items
+    start = 0
+    for m in SENT_END.finditer(text or ""):
+        s = " ".join(text[start:m.start()].split())
+        if s: yield s
+        start = m.end()
+    s = " ".join((text or "")[start:].split())
+    if s: yield s
+
+def normalize(s: str) -> str:
+    return " ".join(re.findall(r'[a-z0-9]+', s.lower()))
+
+def stable_rule_id(text: str, prefix: str = "R") -> str:
+    return f"{prefix}_{hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()[:10].upper()}"
+
+def iter_candidates(paths):
+    for path in paths:
+        path = as_source(path); name = Path(path.name).name
+        # sentences never run across DOCX paragraph/cell boundaries
+        for _, seg in extract_segments(path):
+            for s in iter_sentences(seg):
+                if 20 <= len(s) <= 600 and HINT.search(s):
+                    yield name, s
+
+def rule_from_sentence(s: str, source: str) -> dict:
+    desc = s[:220]
+    tokens = re.findall(r'[A-Za-z0-9\-]{3,}', s)[:10]
+    pattern = '\\b' + '\\s+'.join([re.escape(t) for t in tokens[:5]]) + '\\b' if tokens else re.escape(desc[:40])
+    return {
+        "id": stable_rule_id(s),
+        "type": "doc_text_presence",
+        "severity": "major" if STRONG.search(s) else "minor",
+        "description": desc,
+        "options": {"any": [desc[:120]], "any_regex": [pattern]},
+        "source": source,
+    }
+
+def cluster(texts: list[str], threshold: float = 85, batch: int = 512) -> np.ndarray:
+    # greedy near-duplicate clustering; returns the representative index for each text
+    from rapidfuzz import process, fuzz
+    labels = np.arange(len(texts)); reps: list[int] = []
+    for lo in range(0, len(texts), batch):
+        chunk = list(range(lo, min(lo + batch, len(texts))))
+        q = [texts[i] for i in chunk]
+        if reps:
+            scores = process.cdist(q, [texts[r] for r in reps], scorer=fuzz.token_sort_ratio, score_cutoff=threshold, workers=-1)
+            best = scores.argmax(axis=1); hit = scores[np.arange(len(chunk)), best] >= threshold
+            labels[chunk] = np.where(hit, np.asarray(reps)[best], labels[chunk])
+            open_ = [i for i, h in zip(chunk, hit) if not h]
+        else:
+            open_ = chunk
+        if not open_: continue
+        inner = process.cdist([texts[i] for i in open_], [texts[i] for i in open_], scorer=fuzz.token_sort_ratio,
+                              score_cutoff=threshold, workers=-1)
+        for a, i in enumerate(open_):
+            if labels[i] != i: continue
+            reps.append(i)
+            for b in np.nonzero(inner[a, a+1:] >= threshold)[0] + a + 1:
+                if labels[open_[b]] == open_[b]: labels[open_[b]] = i
+    return labels
+
+def mine_rules(paths, max_items: int = 120, threshold: float = 85) -> pd.DataFrame:
+    with METRICS.span("mine.rules"):
+        return _mine_rules(paths, max_items, threshold)
+
+def _mine_rules(paths, max_items: int, threshold: float) -> pd.DataFrame:
+    found = {}
+    for source, s in iter_candidates(paths):
+        key = normalize(s)
+        hit = found.get(key)
+        if hit is None: found[key] = [source, s, 1, {source}]
+        else: hit[2] += 1; hit[3].add(source)
+    if not found: return pd.DataFrame(columns=["id","type","severity","description","options","source","support","score"])
+    df = pd.DataFrame([(src, s, k, n, len(srcs)) for k, (src, s, n, srcs) in found.items()],
+                      columns=["source","sentence","norm","count","nsrc"])
+    df["cluster"] = cluster(df["norm"].tolist(), threshold) if len(df) > 1 else 0
+    g = df.groupby("cluster")
+    df["support"] = g["count"].transform("sum")
+    df["sources"] = g["nsrc"].transform("max")
+    strong = df["sentence"].str.contains(STRONG).to_numpy()
+    length = df["sentence"].str.len().to_numpy()
+    # rank: strong modal verbs, how often the requirement recurs (and across how many files), sensible length
+    df["score"] = (2.0*strong + np.log1p(df["support"].to_numpy()) + 0.5*np.log1p(df["sources"].to_numpy())
+                   - np.abs(np.log(np.clip(length, 20, None) / 140.0)))
+    reps = df.sort_values("score", ascending=False).drop_duplicates("cluster").head(max_items)
+    out = pd.DataFrame([rule_from_sentence(s, src) for s, src in zip(reps["sentence"], reps["source"])])
+    out["support"] = reps["support"].to_numpy(); out["score"] = reps["score"].round(3).to_numpy()
+    return out.drop_duplicates("id").reset_index(drop=True)
+
+def mine_rules_from_file(path: Path, max_items: int = 120, threshold: float = 85):
+    return mine_rules([path], max_items, threshold)
+
+def new_rules_only(mined: pd.DataFrame, existing: list, threshold: float = 85) -> pd.DataFrame:
+    # drop mined rules whose id is already present or whose description near-duplicates an existing rule
+    if mined.empty: return mined
+    ids = {r.get("id") for r in existing}
+    out = mined[~mined["id"].isin(ids)]
+    descs = [normalize(r.get("description","")) for r in existing if r.get("description")]
+    if descs and not out.empty:
+        from rapidfuzz import process, fuzz
+        scores = process.cdist([normalize(d) for d in out["description"]], descs, scorer=fuzz.token_sort_ratio,
+                               score_cutoff=threshold, workers=-1)
+        out = out[scores.max(axis=1) < threshold]
+    return out
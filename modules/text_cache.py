@@ -0,0 +1,82 @@
+import os, sqlite3, threading, time, zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+# On-disk cache of extracted text, keyed by file sha256 and extractor kind.
+# Pages are stored zlib-compressed; whole documents are evicted least-recently-used
+# once the compressed total exceeds max_bytes.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (sha TEXT, kind TEXT, pages INTEGER, bytes INTEGER, last_used REAL,
+                                 PRIMARY KEY (sha, kind));
+CREATE INDEX IF NOT EXISTS docs_lru ON docs(last_used);
+CREATE TABLE IF NOT EXISTS pages (sha TEXT, kind TEXT, page INTEGER, data BLOB, PRIMARY KEY (sha, kind, page));
+"""
+
+class TextCache:
+    def __init__(self, path: Path = Path("cache/text_cache.sqlite"), max_bytes: int = 512*1024*1024,
+                 touch_every: float = 60.0):
+        # a hit only rewrites last_used once it is touch_every seconds old, so hits stay read-only
+        self.path = Path(path); self.max_bytes = max_bytes; self.touch_every = touch_every
+        self._ready = False; self._lock = threading.Lock()
+
+    @contextmanager
+    def _conn(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    c = sqlite3.connect(self.path, timeout=30)
+                    c.execute("PRAGMA journal_mode=WAL"); c.executescript(SCHEMA); c.close()
+                    self._ready = True
+        c = sqlite3.connect(self.path, timeout=30)
+        try:
+            with c: yield c
+        finally:
+            c.close()
+
+    def get(self, sha: str, kind: str, page: int = None):
+        with self._conn() as c:
+            hit = c.execute("SELECT pages, last_used FROM docs WHERE sha=? AND kind=?", (sha, kind)).fetchone()
+            if not hit: return None
+            if page is None:
+                rows = c.execute("SELECT data FROM pages WHERE sha=? AND kind=? ORDER BY page", (sha, kind)).fetchall()
+                if len(rows) != hit[0]: return None
+            else:
+                rows = c.execute("SELECT data FROM pages WHERE sha=? AND kind=? AND page=?", (sha, kind, page)).fetchall()
+                if not rows: return None
+            now = time.time()
+            if now - (hit[1] or 0) >= self.touch_every:
+                c.execute("UPDATE docs SET last_used=? WHERE sha=? AND kind=?", (now, sha, kind))
+        pages = [zlib.decompress(r[0]).decode("utf-8") for r in rows]
+        return pages if page is None else pages[0]
+
+    def put(self, sha: str, kind: str, pages: list[str]):
+        blobs = [zlib.compress(p.encode("utf-8"), 6) for p in pages]
+        total = sum(len(b) for b in blobs)
+        with self._conn() as c:
+            c.execute("DELETE FROM pages WHERE sha=? AND kind=?", (sha, kind))
+            c.executemany("INSERT INTO pages VALUES (?,?,?,?)", [(sha, kind, i, b) for i, b in enumerate(blobs)])
+            c.execute("INSERT OR REPLACE INTO docs VALUES (?,?,?,?,?)", (sha, kind, len(blobs), total, time.time()))
+        self.evict()
+
+    def size(self) -> int:
+        with self._conn() as c:
+            return c.execute("SELECT COALESCE(SUM(bytes),0) FROM docs").fetchone()[0]
+
+    def evict(self):
+        with self._conn() as c:
+            total = c.execute("SELECT COALESCE(SUM(bytes),0) FROM docs").fetchone()[0]
+            if total <= self.max_bytes: return
+            for sha, kind, b in c.execute("SELECT sha, kind, bytes FROM docs ORDER BY last_used").fetchall():
+                c.execute("DELETE FROM pages WHERE sha=? AND kind=?", (sha, kind))
+                c.execute("DELETE FROM docs WHERE sha=? AND kind=?", (sha, kind))
+                total -= b
+                if total <= self.max_bytes * 0.9: break
+
+    def clear(self):
+        with self._conn() as c:
+            c.execute("DELETE FROM pages"); c.execute("DELETE FROM docs")
+
+# SEKER_CACHE_DIR relocates the cache (also for pool workers, which read it on import)
+TEXT_CACHE = TextCache(Path(os.environ.get("SEKER_CACHE_DIR", "cache")) / "text_cache.sqlite")
@@ -1,14 +1,15 @@
 from pathlib import Path
-import pandas as pd
 import datetime as dt
+from .history_store import open_history
 
 HISTORY_DIR = Path("history")
 HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+HISTORY_DB = HISTORY_DIR / "history.sqlite"
 
 def timestamp():
     return dt.datetime.now().strftime("%Y%m%d_%H%M%S")
 
-def save_history_row(payload: dict, exclude: bool=False):
-    p = HISTORY_DIR / f"history_{timestamp()}{'_excluded' if exclude else ''}.csv"
-    pd.DataFrame([payload]).to_csv(p, index=False)
-    return p
+def save_history_row(payload: dict, exclude: bool=False, findings=None, source: str="app"):
+    # source "submit:<id>": written by the job and by the submitting session, recorded once
+    return open_history(HISTORY_DB).append(payload, exclude=exclude, findings=findings, source=source,
+                                           unique=source != "app")
@@ -0,0 +1,19 @@
+from modules.design_audit import _match_page, tokens
+
+def words(*texts):
+    # fitz-style word tuples laid out left to right
+    return [(10.0 * i, 0.0, 10.0 * i + 8, 5.0, t) for i, t in enumerate(texts)]
+
+def test_hyphenated_and_plural_words_match_terms():
+    term = tuple(tokens("North Arrow"))
+    assert term == ("north", "arrow")
+    assert _match_page(words("NORTH-ARROW"), [term])[term] == [(0.0, 0.0, 8.0, 5.0)]
+    assert term in _match_page(words("see", "north/arrow"), [term])
+    assert _match_page(words("North", "ARROWS"), [term])[term] == [(0.0, 0.0, 18.0, 5.0)]
+    assert ("arrow",) in _match_page(words("ARROWS"), [("arrow",)])
+
+def test_separated_or_reordered_tokens_do_not_match():
+    term = ("north", "arrow")
+    assert _match_page(words("north", "point", "arrow"), [term]) == {}
+    assert _match_page(words("arrow", "north"), [term]) == {}
+    assert _match_page(words("northern", "arrow"), [term]) == {}
@@ -0,0 +1,40 @@
+import random, re
+
+from modules.features import MAX_ITEMS, parse_date, scan
+
+# the per-feature patterns the rule engine and indexer used before features.scan
+BASELINE = {
+    "links": r"https?://\S+|\b\w+\.\w{2,}\b",
+    "dates": r"\b(\d{1,2}[\/-]\d{1,2}[\/-]\d{2,4}|\d{4}-\d{2}-\d{2})\b",
+    "versions": r"\bv(?:ersion)?\s*[:\-]?\s*([0-9]+(?:\.[0-9]+)*)",
+    "ids": r"\b(TDEE\d{5}|TN\d+|RAN\d+)\b",
+}
+CASES = ["see 01/02/2020.pdf", "a87b8355.24/85/68", "TDEE12345.pdf rev v2.10", "issued 2024-03-05, v 1.2.3",
+         "https://example.com/TN42 and www.site.co.uk", "RAN7 tn12 version: 4.0 on 31/12/99"]
+PIECES = ["01/02/2020", "2024-03-05", "31-12-99", "99/99/2020", "v2.10", "Version: 3", "TDEE12345", "tn7", "RAN12",
+          "http://x.io/a", "www.example.com", "file.pdf", ".", "/", "-", "a87b", "8355", "24", " ", "\n", "word"]
+
+def baseline(text: str) -> dict:
+    links = re.findall(BASELINE["links"], text, re.I)
+    dates = re.findall(BASELINE["dates"], text)
+    ids = [m.upper() for m in re.findall(BASELINE["ids"], text, re.I)]
+    return {"links": list(dict.fromkeys(links))[:MAX_ITEMS], "date_strings": len(dates),
+            "dates": sorted({d.isoformat() for d in map(parse_date, dates) if d}),
+            "versions": list(dict.fromkeys(re.findall(BASELINE["versions"], text, re.I)))[:MAX_ITEMS],
+            "ids": list(dict.fromkeys(ids))[:MAX_ITEMS]}
+
+def texts():
+    rnd = random.Random(0)
+    yield from CASES
+    for _ in range(2000):
+        yield "".join(rnd.choice(PIECES) for _ in range(rnd.randint(1, 30)))
+
+def test_scan_matches_per_feature_baseline():
+    for text in texts():
+        assert scan(text, {"links", "dates", "versions", "ids"}) == baseline(text), text
+
+def test_scan_is_independent_of_requested_features():
+    for text in texts():
+        full = scan(text, {"links", "dates", "versions", "ids"})
+        for n in ("links", "dates", "versions", "ids"):
+            assert scan(text, {n})[n] == full[n], (n, text)
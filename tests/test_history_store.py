@@ -0,0 +1,13 @@
+from modules.history_store import HistoryStore
+
+FINDINGS = [{"RuleID": "R1", "Severity": "minor", "Status": "Fail"}, {"RuleID": "R2", "Severity": "major", "Status": "Pass"}]
+
+def test_each_submission_is_recorded_once(tmp_path):
+    # the job and the submitting session both write submit:<id>; identical content submitted
+    # twice (same job) still gives one row per submission
+    s = HistoryStore(tmp_path / "h.sqlite")
+    for sub in ("a", "a", "b"):
+        s.append({"Supplier": "CEG"}, findings=FINDINGS, source=f"submit:{sub}", unique=True)
+    assert s.count() == 2
+    rates = s.failure_rates("Rule").set_index("Rule")
+    assert rates.loc["R1", "Checks"] == 2 and rates.loc["R1", "Failures"] == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from modules import ingest
+from modules.catalog import Catalog
+from modules.text_cache import TextCache
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    import fitz
+    monkeypatch.setattr(ingest, "TEXT_CACHE", TextCache(tmp_path / "text_cache.sqlite"))
+    root = tmp_path / "guidance"; root.mkdir()
+    for name in ("TDEE10001 v1.pdf", "TDEE10002 v1.pdf", "TDEE10003 v1.pdf"):
+        d = fitz.open(); d.new_page().insert_text((72, 72), name); d.save(root / name)
+    return root
+
+def test_unreadable_file_is_reported_and_the_rest_indexed(corpus, tmp_path, monkeypatch):
+    digest = ingest.file_digest
+    def flaky(src):
+        if "10002" in str(src): raise OSError("gone")
+        return digest(src)
+    monkeypatch.setattr(ingest, "file_digest", flaky)
+    errors = []
+    ingest.index_folder(corpus, tmp_path / "index.sqlite", workers=1, errors=errors)
+    assert [e["file"] for e in errors] == ["TDEE10002 v1.pdf"] and "gone" in errors[0]["error"]
+    assert ingest.open_catalog(tmp_path / "index.sqlite").files() == ["TDEE10001 v1.pdf", "TDEE10003 v1.pdf"]
+
+def test_supersede_runs_for_docs_upserted_before_a_crash(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "INDEX_BATCH", 1)
+    extract, seen = ingest.extract_text, []
+    def crash_on_second(src):
+        seen.append(src)
+        if len(seen) == 2: raise KeyboardInterrupt
+        return extract(src)
+    monkeypatch.setattr(ingest, "extract_text", crash_on_second)
+    superseded = []
+    monkeypatch.setattr(Catalog, "supersede", lambda self, keys=None: superseded.append(keys))
+    with pytest.raises(KeyboardInterrupt):
+        ingest.index_folder(corpus, tmp_path / "index.sqlite", workers=1)
+    indexed = ingest.open_catalog(tmp_path / "index.sqlite").frame()["key"].tolist()
+    assert len(indexed) == 1 and superseded == [set(indexed)]
+
+def test_concurrent_zip_extraction_writes_whole_files(tmp_path):
+    import threading, zipfile
+    z = tmp_path / "Guidance.zip"
+    with zipfile.ZipFile(z, "w") as f:
+        for i in range(20): f.writestr(f"dir/doc{i}.docx", bytes([i]) * 200_000)
+    dest, errors, start = tmp_path / "guidance", [], threading.Barrier(6)
+    def go():
+        start.wait()
+        try: ingest.ensure_guidance_from_zip(z, dest)
+        except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=go) for _ in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
+    assert all((dest / "dir" / f"doc{i}.docx").read_bytes() == bytes([i]) * 200_000 for i in range(20))
+    assert sorted(p.name for p in dest.rglob("*") if p.is_file()) == sorted([".guidance_zip.json"] + [f"doc{i}.docx" for i in range(20)])
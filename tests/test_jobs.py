@@ -0,0 +1,49 @@
+import os, sys, threading, types
+from concurrent.futures import Future
+
+from modules.jobs import JobQueue, _update
+
+def test_pool_workers_do_not_run_main_script(tmp_path, monkeypatch):
+    # under `streamlit run`, __main__.__file__ is the app script; workers must not execute it
+    marker = tmp_path / "script_ran"
+    script = tmp_path / "app_script.py"
+    script.write_text(f"open({str(marker)!r}, 'w').write(str(__import__('os').getpid()))\n")
+    fake = types.ModuleType("__main__"); fake.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", fake)
+    q = JobQueue(tmp_path / "jobs", workers=2)
+    try:
+        pids = {q._executor().submit(os.getpid).result(timeout=60) for _ in range(4)}
+    finally:
+        q._pool.shutdown()
+    assert os.getpid() not in pids
+    assert not marker.exists()
+    assert sys.modules["__main__"] is fake
+
+def test_concurrent_submits_enqueue_once(tmp_path, monkeypatch):
+    q = JobQueue(tmp_path / "jobs", workers=1)
+    calls = []
+    class Exec:
+        def submit(self, *a):
+            calls.append(a); return Future()
+    monkeypatch.setattr(q, "_executor", lambda: Exec())
+    ids, start = [], threading.Barrier(8)
+    def go():
+        start.wait(); ids.append(q.submit("mine", "same-input", {"input": "x.docx"}))
+    threads = [threading.Thread(target=go) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(set(ids)) == 1 and len(calls) == 1
+
+def test_failed_job_is_requeued_only_on_retry(tmp_path, monkeypatch):
+    q = JobQueue(tmp_path / "jobs", workers=1)
+    calls = []
+    class Exec:
+        def submit(self, *a):
+            calls.append(a); return Future()
+    monkeypatch.setattr(q, "_executor", lambda: Exec())
+    jid = q.submit("mine", "bad-input", {"input": "x.docx"})
+    _update(q.db, jid, status="failed", message="boom")
+    assert q.submit("mine", "bad-input", {"input": "x.docx"}) == jid and len(calls) == 1
+    assert q.get(jid)["message"] == "boom"
+    q.submit("mine", "bad-input", {"input": "x.docx"}, retry=True)
+    assert len(calls) == 2 and q.get(jid)["status"] == "queued"
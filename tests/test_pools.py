@@ -0,0 +1,13 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.ocr import OCR
+from modules.pools import init_worker, mp_context, worker_settings
+from modules.text_cache import TEXT_CACHE
+
+def test_workers_get_the_parent_config(monkeypatch):
+    monkeypatch.setattr(TEXT_CACHE, "max_bytes", 7 * 1024 * 1024)
+    monkeypatch.setitem(OCR, "dpi", 150)
+    parent = worker_settings()
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context(),
+                             initializer=init_worker, initargs=(parent,)) as ex:
+        assert ex.submit(worker_settings).result(timeout=60) == parent
@@ -0,0 +1,32 @@
+import time
+
+from modules.report_store import ReportStore
+
+def test_put_dedupes_identical_content(tmp_path):
+    s = ReportStore(tmp_path / "r")
+    a = s.put(b"x" * 10, "a.pdf", "upload"); b = s.put(bytearray(b"x" * 10), "b.pdf", "upload")
+    assert a.path == b.path and a.path.read_bytes() == b"x" * 10
+    assert s.stats() == {"objects": 1, "bytes": 10, "artifacts": 2}
+
+def test_put_rewrites_blob_evicted_after_the_presence_check(tmp_path, monkeypatch):
+    s = ReportStore(tmp_path / "r", max_bytes=0)
+    s.put(b"report", "a.xlsx", "findings")
+    has = s._has_object
+    def evicted_meanwhile(sha):
+        seen = has(sha); s.evict(); return seen
+    monkeypatch.setattr(s, "_has_object", evicted_meanwhile)
+    art = s.put(b"report", "a.xlsx", "findings", key="job")
+    assert art.path.read_bytes() == b"report"
+    tmp = s.tmp_path(".xlsx"); tmp.write_bytes(b"report")
+    art = s.put_file(tmp, "a.xlsx", "findings", key="job2", move=True)
+    assert art.path.read_bytes() == b"report" and not tmp.exists()
+    assert s.find(key="job2") is not None
+
+def test_expired_after_eviction_until_remade(tmp_path):
+    s = ReportStore(tmp_path / "r", max_age_days=1)
+    s.put(b"pdf", "a.pdf", "annotated", key="job")
+    assert not s.expired("job")
+    s.evict(now=time.time() + 2 * 86400)
+    assert s.expired("job") and s.find(key="job") is None
+    s.put(b"pdf", "a.pdf", "annotated", key="job")
+    assert not s.expired("job")
@@ -0,0 +1,20 @@
+import sqlite3
+
+from modules.text_cache import TextCache
+
+def last_used(cache, sha):
+    with sqlite3.connect(cache.path) as c:
+        return c.execute("SELECT last_used FROM docs WHERE sha=?", (sha,)).fetchone()[0]
+
+def test_hits_touch_last_used_at_most_once_per_window(tmp_path, monkeypatch):
+    cache = TextCache(tmp_path / "t.sqlite", touch_every=60)
+    clock = [1000.0]
+    monkeypatch.setattr("modules.text_cache.time.time", lambda: clock[0])
+    cache.put("a", "k", ["one", "two"])
+    clock[0] += 30
+    assert cache.get("a", "k") == ["one", "two"] and cache.get("a", "k", 1) == "two"
+    assert last_used(cache, "a") == 1000.0
+    clock[0] += 31
+    assert cache.get("a", "k", 0) == "one"
+    assert last_used(cache, "a") == 1061.0
+    assert cache.get("missing", "k") is None and cache.get("a", "k", 5) is None